@@ -0,0 +1,428 @@
+"""
+End-to-end load test of the API.
+Seeds a synthetic campus into a SQLite storage backend, drives the real
+FastAPI app in-process with concurrent traffic (listing, search,
+my-sessions, join, chat poll and send, login) and reports latency
+percentiles, throughput and storage round trips per endpoint as JSON.
+
+Run from the backend directory:
+    python benchmarks/load_test.py --scale 10k --concurrency 50 --requests 5000
+    python benchmarks/load_test.py --scale 1m --db /tmp/campus.db --output results.json
+
+Scales seed roughly 1k, 10k, 100k or 1M rows in total; --schools, --users,
+--sessions, --participants and --messages override single counts.
+
+SQLite calls do not yield to the event loop, so a request only waits for
+others where the code really awaits (asyncio.gather, the bcrypt pool).
+Compare throughput and round trips across runs on the same machine rather
+than reading the latencies as production numbers.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Make the backend modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The harness always runs against the local backend
+os.environ['STORAGE_BACKEND'] = 'sqlite'
+
+import httpx
+
+from storage import set_storage
+from storage.instrumented import InstrumentedStorage, track_request
+from storage.sqlite_storage import SQLiteStorage
+from functions.auth_functions import create_access_token, hash_password, token_claims
+
+
+# Row counts per scale: (schools, users, sessions, participants, messages).
+# Participants include every session's creator.
+SCALES = {
+    '1k': (2, 100, 200, 400, 300),
+    '10k': (5, 1_000, 2_000, 4_000, 3_000),
+    '100k': (10, 10_000, 20_000, 40_000, 30_000),
+    '1m': (20, 100_000, 200_000, 400_000, 300_000),
+}
+
+# Share of the traffic per operation
+DEFAULT_MIX = {
+    'list_sessions': 25,
+    'search_sessions': 5,
+    'my_sessions': 15,
+    'join_session': 10,
+    'chat_poll': 30,
+    'chat_send': 10,
+    'login': 5,
+}
+
+PASSWORD = 'LoadTest123'
+
+SUBJECTS = [
+    'Calculus', 'Linear Algebra', 'Statistics', 'Organic Chemistry', 'Microeconomics',
+    'Data Structures', 'Algorithms', 'Operating Systems', 'Genetics', 'Physics',
+    'World History', 'Philosophy', 'Databases', 'Machine Learning', 'Thermodynamics'
+]
+FORMATS = ['Exam Prep', 'Problem Set', 'Review', 'Study Group', 'Lab Prep', 'Reading Circle']
+DETAILS = [
+    'Going over past papers and the lecture notes.',
+    'Bring your questions from this week.',
+    'We will work through the practice problems together.',
+    'Quiet study with breaks every hour.',
+    'Focus on the topics from the midterm.'
+]
+MEETING_TYPES = ['on_campus', 'off_campus', 'online']
+
+
+class Campus:
+    """What the traffic generator needs to know about the seeded data"""
+
+    def __init__(self):
+        self.users: List[dict] = []
+        self.sessions_by_school: Dict[str, List[str]] = defaultdict(list)
+        self.course_codes_by_school: Dict[str, List[str]] = defaultdict(list)
+        self.memberships: Dict[str, List[str]] = defaultdict(list)
+
+
+def seed_campus(storage: SQLiteStorage, schools: int, users: int, sessions: int,
+                participants: int, messages: int, rng: random.Random) -> Campus:
+    """
+    Bulk insert a synthetic campus straight into SQLite.
+    Every user shares one bcrypt hash so seeding does not hash per user.
+    """
+    campus = Campus()
+    connection = storage.connection
+    password_hash = hash_password(PASSWORD)
+    now = datetime.utcnow()
+    today = date.today()
+
+    school_names = [f"University {index + 1}" for index in range(schools)]
+    for school in school_names:
+        campus.course_codes_by_school[school] = [
+            f"{subject[:4].upper().replace(' ', '')}{100 + number}"
+            for subject in SUBJECTS for number in (1, 2, 3)
+        ]
+
+    users_by_school: Dict[str, List[str]] = defaultdict(list)
+    user_rows = []
+    for index in range(users):
+        user = {
+            'id': str(uuid.uuid4()),
+            'email': f"student{index}@campus.edu",
+            'first_name': f"Student{index}",
+            'last_name': 'Load',
+            'school': school_names[index % schools]
+        }
+        campus.users.append(user)
+        users_by_school[user['school']].append(user['id'])
+        user_rows.append((user['id'], user['email'], password_hash, user['first_name'],
+                          user['last_name'], user['school'], '', now.isoformat(), now.isoformat()))
+
+    session_rows = []
+    members: Dict[str, set] = {}
+    capacity: Dict[str, int] = {}
+    session_school: Dict[str, str] = {}
+    for _ in range(sessions):
+        creator = rng.choice(campus.users)
+        school = creator['school']
+        session_id = str(uuid.uuid4())
+        subject = rng.choice(SUBJECTS)
+        course_code = rng.choice(campus.course_codes_by_school[school])
+        max_capacity = rng.randint(4, 30)
+        session_rows.append((
+            session_id, f"{subject} {rng.choice(FORMATS)}", course_code, rng.choice(DETAILS),
+            (today + timedelta(days=rng.randrange(60))).isoformat(), f"{rng.randint(8, 20):02d}:00",
+            'Main library', rng.choice(MEETING_TYPES), max_capacity, creator['id'], school,
+            now.isoformat(), now.isoformat()
+        ))
+        campus.sessions_by_school[school].append(session_id)
+        members[session_id] = {creator['id']}
+        capacity[session_id] = max_capacity
+        session_school[session_id] = school
+        campus.memberships[creator['id']].append(session_id)
+
+    participant_rows = [(str(uuid.uuid4()), session_id, next(iter(ids))) for session_id, ids in members.items()]
+    session_ids = list(members)
+    attempts = 0
+    while len(participant_rows) < participants and session_ids and attempts < participants * 5:
+        attempts += 1
+        session_id = rng.choice(session_ids)
+        if len(members[session_id]) >= capacity[session_id]:
+            continue
+        user_id = rng.choice(users_by_school[session_school[session_id]])
+        if user_id in members[session_id]:
+            continue
+        members[session_id].add(user_id)
+        campus.memberships[user_id].append(session_id)
+        participant_rows.append((str(uuid.uuid4()), session_id, user_id))
+
+    message_rows = []
+    active_sessions = [session_id for session_id in session_ids if len(members[session_id]) > 1] or session_ids
+    start = now - timedelta(days=30)
+    for index in range(messages if session_ids else 0):
+        session_id = rng.choice(active_sessions)
+        created_at = start + timedelta(seconds=index * 2_592_000 / max(messages, 1))
+        message_rows.append((str(uuid.uuid4()), session_id, rng.choice(list(members[session_id])),
+                             rng.choice(DETAILS), created_at.isoformat()))
+
+    with connection:
+        connection.executemany(
+            'INSERT INTO users (id, email, password_hash, first_name, last_name, school, bio, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            user_rows
+        )
+        connection.executemany(
+            'INSERT INTO study_sessions (id, title, course_code, description, date, time, location, '
+            'meeting_type, max_capacity, creator_id, school, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            session_rows
+        )
+        connection.executemany(
+            'INSERT INTO session_participants (id, session_id, user_id) VALUES (?, ?, ?)',
+            participant_rows
+        )
+        connection.executemany(
+            'INSERT INTO session_messages (id, session_id, user_id, message, created_at) VALUES (?, ?, ?, ?, ?)',
+            message_rows
+        )
+    connection.execute('ANALYZE')
+    return campus
+
+
+class Recorder:
+    """Latency, status and round-trip samples per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.round_trips: Dict[str, List[int]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, operation: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        with track_request() as stats:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception:
+                self.errors[operation] += 1
+                return None
+        self.latencies[operation].append((time.perf_counter() - start) * 1000)
+        self.round_trips[operation].append(stats.queries)
+        self.statuses[operation][response.status_code] += 1
+        if response.status_code >= 500:
+            self.errors[operation] += 1
+        return response
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    endpoints = {}
+    for operation, samples in sorted(recorder.latencies.items()):
+        samples = sorted(samples)
+        trips = recorder.round_trips[operation]
+        endpoints[operation] = {
+            'requests': len(samples),
+            'errors': recorder.errors[operation],
+            'status_codes': {str(code): count for code, count in sorted(recorder.statuses[operation].items())},
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'latency_ms': {
+                'p50': round(percentile(samples, 50), 3),
+                'p95': round(percentile(samples, 95), 3),
+                'p99': round(percentile(samples, 99), 3),
+                'mean': round(sum(samples) / len(samples), 3),
+                'max': round(samples[-1], 3)
+            },
+            'db_round_trips': {
+                'mean': round(sum(trips) / len(trips), 3),
+                'max': max(trips),
+                'total': sum(trips)
+            }
+        }
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        'requests': total,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'endpoints': endpoints
+    }
+
+
+async def virtual_user(client: httpx.AsyncClient, campus: Campus, tokens: Dict[str, str],
+                       recorder: Recorder, mix: Dict[str, int], remaining: List[int], rng: random.Random) -> None:
+    """Issue requests as random users until the shared budget is spent"""
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    chat_etags: Dict[str, str] = {}
+
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        user = rng.choice(campus.users)
+        headers = {'Authorization': f"Bearer {tokens[user['id']]}"}
+        joined = campus.memberships.get(user['id'])
+        operation = rng.choices(operations, weights)[0]
+        if operation in ('chat_poll', 'chat_send') and not joined:
+            operation = 'list_sessions'
+
+        if operation == 'list_sessions':
+            params = {'limit': 50}
+            if rng.random() < 0.3:
+                params['course_code'] = rng.choice(campus.course_codes_by_school[user['school']])
+            await recorder.request(client, operation, 'GET', '/sessions/', params=params, headers=headers)
+
+        elif operation == 'search_sessions':
+            params = {'q': rng.choice(SUBJECTS).split()[0], 'limit': 20}
+            await recorder.request(client, operation, 'GET', '/sessions/', params=params, headers=headers)
+
+        elif operation == 'my_sessions':
+            await recorder.request(client, operation, 'GET', '/sessions/my/sessions', headers=headers)
+
+        elif operation == 'join_session':
+            school_sessions = campus.sessions_by_school.get(user['school'])
+            if not school_sessions:
+                continue
+            session_id = rng.choice(school_sessions)
+            response = await recorder.request(client, operation, 'POST', f'/sessions/{session_id}/join', headers=headers)
+            if response is not None and response.status_code == 200:
+                campus.memberships[user['id']].append(session_id)
+
+        elif operation == 'chat_poll':
+            session_id = rng.choice(joined)
+            key = f"{user['id']}:{session_id}"
+            poll_headers = dict(headers)
+            if key in chat_etags:
+                poll_headers['If-None-Match'] = chat_etags[key]
+            response = await recorder.request(
+                client, operation, 'GET', f'/chat/{session_id}/messages',
+                params={'limit': 50}, headers=poll_headers
+            )
+            if response is not None and 'etag' in response.headers:
+                chat_etags[key] = response.headers['etag']
+
+        elif operation == 'chat_send':
+            session_id = rng.choice(joined)
+            await recorder.request(
+                client, operation, 'POST', f'/chat/{session_id}/messages',
+                json={'session_id': session_id, 'message': rng.choice(DETAILS)}, headers=headers
+            )
+
+        elif operation == 'login':
+            await recorder.request(
+                client, operation, 'POST', '/auth/login',
+                json={'email': user['email'], 'password': PASSWORD}
+            )
+
+
+async def run_load(app, campus: Campus, concurrency: int, requests: int,
+                   mix: Dict[str, int], seed: int) -> Dict[str, Any]:
+    tokens = {user['id']: create_access_token(data=token_claims(user)) for user in campus.users}
+    recorder = Recorder()
+    remaining = [requests]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://loadtest') as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, campus, tokens, recorder, mix, remaining, random.Random(seed + worker))
+            for worker in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+    return summarize(recorder, elapsed)
+
+
+def parse_mix(value: Optional[str]) -> Dict[str, int]:
+    """Parse "list_sessions=50,chat_poll=50" into operation weights"""
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        if operation not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation {operation!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[operation] = int(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='10k', help="Preset seed size")
+    parser.add_argument('--schools', type=int, help="Override the number of schools")
+    parser.add_argument('--users', type=int, help="Override the number of users")
+    parser.add_argument('--sessions', type=int, help="Override the number of sessions")
+    parser.add_argument('--participants', type=int, help="Override the number of participant rows")
+    parser.add_argument('--messages', type=int, help="Override the number of chat messages")
+    parser.add_argument('--db', default=':memory:', help="SQLite database file (replaced if it exists)")
+    parser.add_argument('--concurrency', type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument('--requests', type=int, default=2000, help="Total requests to send")
+    parser.add_argument('--mix', help="Traffic weights, e.g. list_sessions=50,chat_poll=50")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    schools, users, sessions, participants, messages = SCALES[args.scale]
+    counts = {
+        'schools': args.schools or schools,
+        'users': args.users or users,
+        'sessions': args.sessions if args.sessions is not None else sessions,
+        'participants': args.participants if args.participants is not None else participants,
+        'messages': args.messages if args.messages is not None else messages
+    }
+    mix = parse_mix(args.mix)
+
+    if args.db != ':memory:' and os.path.exists(args.db):
+        os.remove(args.db)
+
+    # The API logs with print(); keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        import main as api
+
+        storage = SQLiteStorage(args.db)
+        start = time.perf_counter()
+        campus = seed_campus(storage, rng=random.Random(args.seed), **counts)
+        seed_seconds = time.perf_counter() - start
+        print(f"Seeded {storage.table_counts()} in {seed_seconds:.1f}s")
+
+        set_storage(InstrumentedStorage(storage))
+        results = asyncio.run(run_load(api.app, campus, args.concurrency, args.requests, mix, args.seed))
+        rows = storage.table_counts()
+        asyncio.run(storage.close())
+
+    report = {
+        'config': {
+            'scale': args.scale,
+            'seed_counts': counts,
+            'db': args.db,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'mix': mix,
+            'seed': args.seed
+        },
+        'seed_seconds': round(seed_seconds, 3),
+        'rows_after': rows,
+        **results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Serialization benchmark for the list endpoints.
+Compares FastAPI's default response_model path with the direct
+pydantic-core path used by functions/responses.py.
+
+Run from the backend directory:
+    python benchmarks/serialization_bench.py --sessions 1000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+# Make the backend modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from config import settings
+from models import StudySessionResponse, MeetingType
+from functions.responses import session_list_adapter
+
+
+def build_sessions(count: int) -> List[StudySessionResponse]:
+    """Build realistic session models, as the listing route has them"""
+    now = datetime.utcnow()
+    meeting_types = list(MeetingType)
+    sessions = []
+    for i in range(count):
+        sessions.append(StudySessionResponse(
+            id=str(uuid.uuid4()),
+            title=f"CS{100 + i % 50} Exam Prep #{i}",
+            course_code=f"CS{100 + i % 50}",
+            description="Going over past papers and the week's lecture notes. Bring questions!",
+            date=(now + timedelta(days=i % 60)).date().isoformat(),
+            time=f"{9 + i % 10:02d}:00",
+            location="Library, room 2.14",
+            meeting_type=meeting_types[i % len(meeting_types)],
+            max_capacity=8,
+            current_capacity=i % 9,
+            creator_id=str(uuid.uuid4()),
+            creator_name="Jane Doe",
+            created_at=now,
+            updated_at=now,
+            is_full=i % 9 >= 8
+        ))
+    return sessions
+
+
+def default_path(field, sessions) -> bytes:
+    """Validate against response_model, jsonable_encoder, then json.dumps"""
+    content = asyncio.run(serialize_response(field=field, response_content=sessions, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def fast_path(sessions) -> bytes:
+    """Dump the already-built models directly"""
+    return session_list_adapter.dump_json(sessions)
+
+
+def time_it(func, repeat: int) -> float:
+    """Best wall time of repeat runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=1000, help="Sessions per response")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    sessions = build_sessions(args.sessions)
+    field = create_model_field(name='Response_get_available_sessions', type_=List[StudySessionResponse], mode='serialization')
+
+    before = time_it(lambda: default_path(field, sessions), args.repeat)
+    after = time_it(lambda: fast_path(sessions), args.repeat)
+
+    body = fast_path(sessions)
+    compressed = gzip.compress(body, compresslevel=settings.COMPRESSION_LEVEL)
+    gzip_ms = time_it(lambda: gzip.compress(body, compresslevel=settings.COMPRESSION_LEVEL), args.repeat)
+
+    per_1k = 1000 / args.sessions
+    print(f"Serializing {args.sessions} sessions (best of {args.repeat})")
+    print(f"  default response_model path: {before:8.2f} ms  ({before * per_1k:.2f} ms per 1k)")
+    print(f"  direct dump_json path:       {after:8.2f} ms  ({after * per_1k:.2f} ms per 1k)")
+    print(f"  speedup:                     {before / after:8.1f}x")
+    print(f"  body size:                   {len(body):8d} bytes")
+    print(f"  gzip level {settings.COMPRESSION_LEVEL}:                {len(compressed):8d} bytes in {gzip_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+In-process caching utilities.
+Provides a bounded, TTL-based LRU cache used to keep hot lookups off the network.
+
+Caches are per worker process: entries expire after their TTL, so data changed
+by another worker is never served stale for longer than that.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class TTLCache:
+    """
+    Bounded least-recently-used cache whose entries expire after a fixed TTL.
+    Tracks hits, misses and evictions so cache effectiveness can be monitored.
+    
+    on_remove, if given, is called with the key of every entry that leaves
+    the cache: expired, evicted, invalidated or cleared. It runs after the
+    cache's lock is released, so it may use the cache.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float, on_remove: Optional[Callable[[Hashable], None]] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.on_remove = on_remove
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for key, or default if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            
+            del self._data[key]
+            self.misses += 1
+        self._removed([key])
+        return default
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        """
+        evicted = []
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[0])
+                self.evictions += 1
+        self._removed(evicted)
+    
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value without touching counters or LRU order.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return default
+            return entry[0]
+    
+    def replace(self, key: Hashable, value: Any) -> bool:
+        """
+        Replace the value of a live entry, keeping its original expiry.
+        Returns False if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return False
+            self._data[key] = (value, entry[1])
+            return True
+    
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove a single entry if present.
+        """
+        with self._lock:
+            removed = self._data.pop(key, None) is not None
+        if removed:
+            self._removed([key])
+    
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            keys = list(self._data)
+            self._data.clear()
+        self._removed(keys)
+    
+    def _removed(self, keys: Iterable[Hashable]) -> None:
+        if self.on_remove is not None:
+            for key in keys:
+                self.on_remove(key)
+    
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        Return size and hit/miss counters for monitoring.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
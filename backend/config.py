@@ -21,10 +21,66 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     
+    # Storage Configuration
+    # "supabase" (hosted Postgres) or "sqlite" (local file, for offline development and load tests)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "supabase").lower()
+    # SQLite database file, or ":memory:" for a throwaway database
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "studymate.db")
+    
     # JWT Configuration
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_HOURS: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_HOURS", "24"))
+    # Verified token payloads kept per worker (never past the token's own expiry)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+    
+    # Password Hashing Configuration
+    # Threads running bcrypt, and how many callers may wait for one before getting 503
+    PASSWORD_POOL_WORKERS: int = int(os.getenv("PASSWORD_POOL_WORKERS", "4"))
+    PASSWORD_POOL_MAX_PENDING: int = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "64"))
+    
+    # Cache Configuration
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    LISTING_CACHE_SIZE: int = int(os.getenv("LISTING_CACHE_SIZE", "1000"))
+    LISTING_CACHE_TTL_SECONDS: int = int(os.getenv("LISTING_CACHE_TTL_SECONDS", "30"))
+    MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+    MEMBERSHIP_CACHE_TTL_SECONDS: int = int(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+    
+    # Session Configuration
+    # Most sessions a single create request may produce, recurrences included
+    MAX_SESSIONS_PER_REQUEST: int = int(os.getenv("MAX_SESSIONS_PER_REQUEST", "100"))
+    # Longest window GET /sessions/calendar serves, in days
+    MAX_CALENDAR_DAYS: int = int(os.getenv("MAX_CALENDAR_DAYS", "62"))
+    # Full-text search: "postgres" (tsvector + GIN) or "memory" (in-process inverted index)
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "postgres").lower()
+    SEARCH_INDEX_TTL_SECONDS: int = int(os.getenv("SEARCH_INDEX_TTL_SECONDS", "60"))
+    
+    # Chat Configuration
+    # Messages removed per round trip when a session's chat is purged in the background
+    MESSAGE_PURGE_BATCH_SIZE: int = int(os.getenv("MESSAGE_PURGE_BATCH_SIZE", "5000"))
+    
+    # Real-time Configuration
+    # Messages buffered per WebSocket connection before it is dropped as too slow
+    CHAT_WS_QUEUE_SIZE: int = int(os.getenv("CHAT_WS_QUEUE_SIZE", "100"))
+    # How often an open chat WebSocket re-checks that its user still participates
+    CHAT_WS_MEMBERSHIP_CHECK_SECONDS: int = int(os.getenv("CHAT_WS_MEMBERSHIP_CHECK_SECONDS", "30"))
+    # Listing change events buffered per SSE stream, and keep-alive interval
+    SESSION_EVENTS_QUEUE_SIZE: int = int(os.getenv("SESSION_EVENTS_QUEUE_SIZE", "100"))
+    SSE_HEARTBEAT_SECONDS: int = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    
+    # Response Configuration
+    # Gzip bodies of at least COMPRESSION_MINIMUM_SIZE bytes
+    RESPONSE_COMPRESSION: bool = os.getenv("RESPONSE_COMPRESSION", "True").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_LEVEL: int = int(os.getenv("COMPRESSION_LEVEL", "6"))
+    
+    # Metrics Configuration
+    # Per-route request and database metrics at GET /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    # Add a Server-Timing header with database time and query counts to every response
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "False").lower() == "true"
     
     # CORS Configuration
     ALLOWED_ORIGINS: list = [
@@ -0,0 +1,101 @@
+"""
+Shared FastAPI dependencies for authenticated routes.
+Resolves the caller of a request into a Principal from the access token.
+"""
+
+from fastapi import HTTPException, status, Depends, Header
+
+from models import Principal
+from storage import get_storage
+from functions.auth_functions import verify_token
+from functions.user_functions import get_user_profile, user_display_name
+
+
+async def get_principal(token: str, db) -> Principal:
+    """
+    Resolve an access token into the authenticated user.
+    
+    Tokens carry the user's school and name, so this normally costs a cached
+    token lookup and no database query. Tokens issued before those claims
+    existed fall back to the (cached) users lookup.
+    
+    Args:
+        token: JWT access token
+        db: Storage backend
+        
+    Returns:
+        Principal for the token's user
+        
+    Raises:
+        HTTPException: If the token is invalid, expired, or its user is gone
+    """
+    payload = verify_token(token)
+    user_id = payload.get("sub")
+    
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    
+    if payload.get("school") and payload.get("name"):
+        return Principal(
+            id=user_id,
+            email=payload.get("email", ""),
+            school=payload["school"],
+            name=payload["name"]
+        )
+    
+    user = await get_user_profile(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    
+    return Principal(
+        id=user['id'],
+        email=user['email'],
+        school=user['school'],
+        name=user_display_name(user)
+    )
+
+
+async def get_current_user(
+    authorization: str = Header(None),
+    db = Depends(get_storage)
+) -> Principal:
+    """
+    Dependency to extract and verify the current user from JWT token in Authorization header.
+    
+    Expected header format: "Bearer <token>"
+    """
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing authorization header"
+        )
+    
+    try:
+        scheme, token = authorization.split()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format"
+        )
+    
+    if scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication scheme"
+        )
+    
+    try:
+        return await get_principal(token, db)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token verification failed"
+        )
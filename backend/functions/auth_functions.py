@@ -5,14 +5,23 @@ Handles user registration, login, token generation, and password validation.
 
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
+import hashlib
+import time
 import jwt
 import bcrypt
 from fastapi import HTTPException, status
-from supabase import Client
 from pydantic import EmailStr
 
+from cache import TTLCache
 from config import settings
 from models import RegisterRequest, AuthResponse
+from functions.user_functions import cache_user
+from functions.password_pool import password_pool
+from storage import Storage
+
+
+# Decoded payloads of recently verified tokens, keyed by SHA-256 of the token
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
 
 
 def hash_password(password: str) -> str:
@@ -66,9 +75,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def token_claims(user: dict) -> dict:
+    """
+    Build the access token claims for a user.
+    School and display name are included so authenticated requests can
+    resolve the caller without a database query.
+    
+    Args:
+        user: users row
+        
+    Returns:
+        Claims to pass to create_access_token
+    """
+    return {
+        "sub": user['id'],
+        "email": user['email'],
+        "school": user['school'],
+        "name": f"{user['first_name']} {user['last_name']}"
+    }
+
+
 def verify_token(token: str) -> dict:
     """
     Verify and decode a JWT token.
+    Payloads of tokens verified recently are served from cache until the
+    token expires, so repeat requests skip signature verification.
     
     Args:
         token: JWT token to verify
@@ -79,10 +110,17 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid or expired
     """
+    digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = token_cache.get(digest)
+    if payload is not None and payload.get('exp', 0) > time.time():
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        token_cache.set(digest, payload)
         return payload
     except jwt.ExpiredSignatureError:
+        token_cache.invalidate(digest)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired"
@@ -117,14 +155,14 @@ def validate_school_email(email: EmailStr) -> bool:
 
 
 async def register_user(
-    db: Client,
+    db: Storage,
     register_data: RegisterRequest
 ) -> AuthResponse:
     """
     Register a new user in the system.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         register_data: Registration data
         
     Returns:
@@ -142,8 +180,7 @@ async def register_user(
     
     # Check if user already exists
     try:
-        existing_user = db.table('users').select('id').eq('email', register_data.email).execute()
-        if existing_user.data:
+        if await db.users.email_exists(register_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -155,8 +192,8 @@ async def register_user(
                 detail="Database error during registration"
             )
     
-    # Hash password
-    hashed_password = hash_password(register_data.password)
+    # Hash password on the dedicated pool so the event loop stays free
+    hashed_password = await password_pool.run(hash_password, register_data.password)
     print(f"[REGISTER] Password hashed for {register_data.email}")
     
     # Create user in database
@@ -172,12 +209,12 @@ async def register_user(
         }
         
         print(f"[REGISTER] Inserting user with fields: {list(user_data.keys())}")
-        response = db.table('users').insert(user_data).execute()
-        user = response.data[0]
+        user = await db.users.create(user_data)
         print(f"[REGISTER] User created successfully: {user['id']} | Email: {user['email']}")
+        cache_user(user)
         
         # Create access token
-        access_token = create_access_token(data={"sub": user['id'], "email": user['email']})
+        access_token = create_access_token(data=token_claims(user))
         
         return AuthResponse(
             id=user['id'],
@@ -198,7 +235,7 @@ async def register_user(
 
 
 async def login_user(
-    db: Client,
+    db: Storage,
     email: EmailStr,
     password: str
 ) -> AuthResponse:
@@ -206,7 +243,7 @@ async def login_user(
     Authenticate a user and return access token.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         email: User email
         password: User password
         
@@ -218,16 +255,15 @@ async def login_user(
     """
     try:
         # Fetch user from database
-        response = db.table('users').select('*').eq('email', email).execute()
-        print(f"[LOGIN] Database query for email '{email}': {response.data if response.data else 'NO USER FOUND'}")
+        user = await db.users.get_by_email(email)
+        print(f"[LOGIN] Database query for email '{email}': {user if user else 'NO USER FOUND'}")
         
-        if not response.data:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        user = response.data[0]
         print(f"[LOGIN] User found: {user.get('email')} | Has password_hash: {'password_hash' in user}")
         
         # Verify password
@@ -238,7 +274,7 @@ async def login_user(
                 detail="Invalid email or password"
             )
         
-        password_match = verify_password(password, user['password_hash'])
+        password_match = await password_pool.run(verify_password, password, user['password_hash'])
         print(f"[LOGIN] Password verification result: {password_match}")
         
         if not password_match:
@@ -247,8 +283,10 @@ async def login_user(
                 detail="Invalid email or password"
             )
         
+        cache_user(user)
+        
         # Create access token
-        access_token = create_access_token(data={"sub": user['id'], "email": user['email']})
+        access_token = create_access_token(data=token_claims(user))
         
         return AuthResponse(
             id=user['id'],
@@ -4,15 +4,41 @@ Handles message creation, retrieval, and session-based messaging.
 """
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
-from supabase import Client
 
 from models import ChatMessageCreate, ChatMessageResponse
+from functions.user_functions import get_user_profile, get_user_profiles, user_display_name
+from functions.pagination import encode_cursor, decode_cursor
+from functions.realtime import chat_hub
+from functions.membership import membership_index
+from storage import Storage
+
+
+# Sort key of a chat, backed by idx_session_messages_session_seq. seq is
+# assigned by the database on insert, so concurrent sends from different
+# API servers cannot be ordered by their clocks
+MESSAGE_ORDER = ('seq',)
+
+
+async def is_session_participant(db: Storage, session_id: str, user_id: str) -> bool:
+    """
+    Check whether a user is a participant in a session.
+    Answered from the per-worker membership index after the first lookup.
+    
+    Args:
+        db: Storage backend
+        session_id: ID of the session
+        user_id: ID of the user
+        
+    Returns:
+        True if the user has joined the session
+    """
+    return await membership_index.is_member(db, session_id, user_id)
 
 
 async def send_message(
-    db: Client,
+    db: Storage,
     user_id: str,
     message_data: ChatMessageCreate
 ) -> ChatMessageResponse:
@@ -20,7 +46,7 @@ async def send_message(
     Send a message in a session group chat.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         user_id: ID of the user sending the message
         message_data: Message content
         
@@ -32,45 +58,43 @@ async def send_message(
     """
     try:
         # Check if user is a participant in the session
-        participant_response = db.table('session_participants').select('id').eq('session_id', message_data.session_id).eq('user_id', user_id).execute()
-        
-        if not participant_response.data:
+        if not await is_session_participant(db, message_data.session_id, user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not a participant in this session"
             )
         
         # Get user information
-        user_response = db.table('users').select('first_name, last_name').eq('id', user_id).execute()
-        if not user_response.data:
+        user = await get_user_profile(db, user_id)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        user = user_response.data[0]
-        now = datetime.utcnow().isoformat()
-        
-        # Insert message
+        # Insert message; the database assigns created_at and seq
         message_insert = {
             'session_id': message_data.session_id,
             'user_id': user_id,
-            'message': message_data.message,
-            'created_at': now
+            'message': message_data.message
         }
         
-        response = db.table('session_messages').insert(message_insert).execute()
-        message = response.data[0]
+        message = await db.messages.create(message_insert)
         
-        return ChatMessageResponse(
+        chat_message = ChatMessageResponse(
             id=message['id'],
             session_id=message['session_id'],
             user_id=message['user_id'],
-            user_name=f"{user['first_name']} {user['last_name']}",
+            user_name=user_display_name(user),
             message=message['message'],
             created_at=datetime.fromisoformat(message['created_at']),
             edited_at=None
         )
+        
+        # Push to everyone connected to the session's WebSocket
+        chat_hub.publish(chat_message.session_id, chat_message.model_dump_json())
+        
+        return chat_message
     
     except HTTPException:
         raise
@@ -81,48 +105,114 @@ async def send_message(
         )
 
 
-async def get_session_messages(db: Client, session_id: str, limit: int = 50, offset: int = 0) -> List[ChatMessageResponse]:
+async def _check_can_read(db: Storage, session_id: str, user_id: str) -> None:
+    # Same membership rule as sending, checked in memory
+    if not await is_session_participant(db, session_id, user_id):
+        if not await db.sessions.exists(session_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a participant in this session"
+        )
+
+
+async def get_messages_version(db: Storage, session_id: str, user_id: str) -> str:
+    """
+    Version token of a session's chat, for its ETag.
+    
+    Changes whenever a message is sent, edited or deleted, or an author is
+    renamed. The database keeps it in a per-session counter, so reading it
+    is one row lookup. Checks the same membership rule as reading the
+    messages, so a 304 reveals nothing more.
+    
+    Raises:
+        HTTPException: If the session does not exist or the user is not a participant
+    """
+    try:
+        await _check_can_read(db, session_id, user_id)
+        return await db.messages.version(session_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve messages: {str(e)}"
+        )
+
+
+async def get_session_messages(
+    db: Storage,
+    session_id: str,
+    user_id: str,
+    limit: int = 50,
+    offset: int = 0,
+    after: Optional[str] = None,
+    before: Optional[str] = None
+) -> Tuple[List[ChatMessageResponse], Optional[str], Optional[str]]:
     """
-    Retrieve all messages in a session group chat.
+    Retrieve messages in a session group chat.
+    
+    Without a cursor, returns messages oldest first starting at offset.
+    With after, returns only messages newer than the cursor, which makes
+    polling for new messages cheap (an empty list when nothing changed).
+    With before, returns the page of messages just older than the cursor,
+    fetched by seq keyset.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         session_id: ID of the session
+        user_id: ID of the user reading the chat (must be a participant)
         limit: Maximum number of messages to return
-        offset: Number of messages to skip
+        offset: Number of messages to skip (only used without a cursor)
+        after: Cursor of the newest message the client already has
+        before: Cursor of the oldest message the client already has
         
     Returns:
-        List of ChatMessageResponse ordered by creation time
+        Tuple of (messages ordered by creation time, cursor to pass as before
+        for older history, cursor to pass as after for newer messages)
+        
+    Raises:
+        HTTPException: If the session does not exist, the user is not a
+            participant, or both cursors are given
     """
+    if after and before:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either after or before, not both"
+        )
+    
     try:
-        # Verify session exists
-        session_response = db.table('study_sessions').select('id').eq('id', session_id).execute()
-        if not session_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found"
-            )
+        await _check_can_read(db, session_id, user_id)
         
-        # Get messages
-        messages_response = db.table('session_messages').select('*').eq('session_id', session_id).order('created_at', desc=False).range(offset, offset + limit).execute()
+        after_key = decode_cursor(after, len(MESSAGE_ORDER)) if after else None
+        before_key = decode_cursor(before, len(MESSAGE_ORDER)) if before else None
+        
+        # Get messages, oldest first
+        rows = await db.messages.list(session_id, limit, offset, after_key, before_key)
+        
+        # Resolve every distinct author in one lookup
+        authors = await get_user_profiles(db, (msg['user_id'] for msg in rows))
         
         messages = []
-        for msg in messages_response.data if messages_response.data else []:
-            # Get user name
-            user_response = db.table('users').select('first_name, last_name').eq('id', msg['user_id']).execute()
-            user = user_response.data[0] if user_response.data else {'first_name': 'Unknown', 'last_name': 'User'}
-            
+        for msg in rows:
             messages.append(ChatMessageResponse(
                 id=msg['id'],
                 session_id=msg['session_id'],
                 user_id=msg['user_id'],
-                user_name=f"{user['first_name']} {user['last_name']}",
+                user_name=user_display_name(authors.get(msg['user_id'])),
                 message=msg['message'],
                 created_at=datetime.fromisoformat(msg['created_at']),
                 edited_at=msg.get('edited_at')
             ))
         
-        return messages
+        # With no rows, keep handing back the cursors the client sent
+        before_cursor = encode_cursor([rows[0][c] for c in MESSAGE_ORDER]) if rows else before
+        after_cursor = encode_cursor([rows[-1][c] for c in MESSAGE_ORDER]) if rows else after
+        
+        return messages, before_cursor, after_cursor
     
     except HTTPException:
         raise
@@ -133,12 +223,12 @@ async def get_session_messages(db: Client, session_id: str, limit: int = 50, off
         )
 
 
-async def delete_message(db: Client, user_id: str, message_id: str) -> None:
+async def delete_message(db: Storage, user_id: str, message_id: str) -> None:
     """
     Delete a message (only by the message creator).
     
     Args:
-        db: Supabase client
+        db: Storage backend
         user_id: ID of the user attempting to delete
         message_id: ID of the message to delete
         
@@ -147,23 +237,23 @@ async def delete_message(db: Client, user_id: str, message_id: str) -> None:
     """
     try:
         # Get message
-        message_response = db.table('session_messages').select('user_id').eq('id', message_id).execute()
+        author_id = await db.messages.get_author_id(message_id)
         
-        if not message_response.data:
+        if author_id is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Message not found"
             )
         
         # Check if user is the creator
-        if message_response.data[0]['user_id'] != user_id:
+        if author_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only delete your own messages"
             )
         
         # Delete message
-        db.table('session_messages').delete().eq('id', message_id).execute()
+        await db.messages.delete(message_id)
     
     except HTTPException:
         raise
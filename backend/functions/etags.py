@@ -0,0 +1,66 @@
+"""
+Conditional GET helpers.
+Builds strong ETags from cheap version tokens and answers If-None-Match,
+so an unchanged poll gets a 304 before any response body is built.
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Response, status
+
+
+# Browsers must revalidate with If-None-Match before reusing a response
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from a version token and the request parameters
+    that shape the response.
+    """
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def make_content_etag(body: bytes, *parts) -> str:
+    """
+    Build a strong ETag from the bytes actually served, plus any headers
+    that shape the response. For responses whose content can lag the
+    version token, e.g. search results ranked by the in-process index.
+    """
+    digest = hashlib.sha256(body)
+    for part in parts:
+        digest.update(f'|{part}'.encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+    If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the ETag to a full response"""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = CACHE_CONTROL
@@ -0,0 +1,98 @@
+"""
+Per-worker index of session membership used to authorize chat access.
+Each session's participant set is loaded on demand with one query, then
+kept current by join, leave and delete so chat reads and sends authorize
+in memory. Only members are answered from memory: a user missing from a
+loaded set may have joined on another worker, so their participant row is
+checked before access is denied.
+"""
+
+from typing import Set
+
+from cache import TTLCache
+from config import settings
+from storage import Storage
+
+
+class MembershipIndex:
+    """
+    Maps session ID to the set of user IDs participating in it.
+    
+    Sets are bounded in number (LRU) and expire after a TTL, which also bounds
+    how long a change made by another worker can go unnoticed.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._members = TTLCache(maxsize, ttl_seconds)
+    
+    async def members(self, db: Storage, session_id: str) -> Set[str]:
+        """
+        Get the participant IDs of a session, loading them on a miss.
+        
+        Args:
+            db: Storage backend
+            session_id: ID of the session
+            
+        Returns:
+            Set of user IDs (empty if the session has no participants or does not exist)
+        """
+        members = self._members.get(session_id)
+        if members is None:
+            members = await self._load(db, session_id)
+        return members
+    
+    async def _load(self, db: Storage, session_id: str) -> Set[str]:
+        members = set(await db.participants.user_ids_for_session(session_id))
+        self._members.set(session_id, members)
+        return members
+    
+    async def is_member(self, db: Storage, session_id: str, user_id: str) -> bool:
+        """
+        Check whether a user participates in a session.
+        
+        A "no" from a set loaded by an earlier request may be stale, e.g. the
+        user joined on another worker or while that load was in flight, so
+        it is confirmed against the participant row first.
+        """
+        members = self._members.get(session_id)
+        if members is None:
+            # Loaded just now, after any join this request could depend on
+            return user_id in await self._load(db, session_id)
+        if user_id in members:
+            return True
+        if await db.participants.is_participant(session_id, user_id):
+            members.add(user_id)
+            return True
+        return False
+    
+    def add(self, session_id: str, user_id: str) -> None:
+        """
+        Record a join. Sessions that are not loaded are left alone.
+        """
+        members = self._members.peek(session_id)
+        if members is not None:
+            members.add(user_id)
+    
+    def remove(self, session_id: str, user_id: str) -> None:
+        """
+        Record a leave. Sessions that are not loaded are left alone.
+        """
+        members = self._members.peek(session_id)
+        if members is not None:
+            members.discard(user_id)
+    
+    def invalidate(self, session_id: str) -> None:
+        """
+        Forget a session entirely (e.g. after it is deleted).
+        """
+        self._members.invalidate(session_id)
+    
+    def stats(self) -> dict:
+        """
+        Return size and hit/miss counters for monitoring.
+        """
+        return self._members.stats()
+
+
+# Per-worker membership index shared by all requests
+membership_index = MembershipIndex(settings.MEMBERSHIP_CACHE_SIZE, settings.MEMBERSHIP_CACHE_TTL_SECONDS)
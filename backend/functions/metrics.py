@@ -0,0 +1,202 @@
+"""
+Request metrics in the Prometheus text format.
+MetricsMiddleware times every HTTP request and records, per route, the
+database queries, database time and rows the storage layer reported for it
+(see storage/instrumented.py). GET /metrics serves the result.
+"""
+
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from storage.instrumented import RequestStats, track_request
+
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                label_text = _format_labels(self.label_names, labels, f'le="{_format_number(bound)}"')
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            cumulative += counts[-1]
+            label_text = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(total[0])}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Per-route request and database metrics of this worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        route = ('method', 'route')
+        self.requests = Counter('http_requests_total', 'HTTP requests served.', ('method', 'route', 'status'))
+        self.duration = Histogram(
+            'http_request_duration_seconds', 'Time to serve a request.', route, DURATION_BUCKETS
+        )
+        self.queries = Histogram(
+            'http_request_db_queries', 'Database round trips per request.', route, QUERY_BUCKETS
+        )
+        self.db_time = Histogram(
+            'http_request_db_seconds', 'Time spent in the database per request.', route, DURATION_BUCKETS
+        )
+        self.rows = Histogram(
+            'http_request_db_rows', 'Rows returned by the database per request.', route, ROW_BUCKETS
+        )
+        self.queries_total = Counter('db_queries_total', 'Database round trips.', route)
+        self.rows_total = Counter('db_rows_total', 'Rows returned by the database.', route)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        """
+        Record one finished request.
+        """
+        labels = (method, route)
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            self.duration.observe(labels, seconds)
+            self.queries.observe(labels, stats.queries)
+            self.db_time.observe(labels, stats.db_seconds)
+            self.rows.observe(labels, stats.rows)
+            self.queries_total.inc(labels, stats.queries)
+            self.rows_total.inc(labels, stats.rows)
+
+    def render(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.duration, self.queries, self.db_time,
+                           self.rows, self.queries_total, self.rows_total):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Record every HTTP request in the registry, labelled with its route
+    template (e.g. /sessions/{session_id}) so label sets stay bounded.
+
+    With server_timing, responses carry a Server-Timing header with the
+    database time, query and row counts, and the time to the first byte.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry, server_timing: bool = False):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        with track_request() as stats:
+
+            async def send_with_metrics(message: Message) -> None:
+                nonlocal status_code
+                if message['type'] == 'http.response.start':
+                    status_code = message['status']
+                    if self.server_timing:
+                        elapsed = (time.perf_counter() - start) * 1000
+                        MutableHeaders(scope=message).append(
+                            'Server-Timing',
+                            f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries, {stats.rows} rows", '
+                            f'app;dur={elapsed:.2f}'
+                        )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                route = scope.get('route')
+                self.registry.observe_request(
+                    scope['method'],
+                    getattr(route, 'path', None) or 'unmatched',
+                    status_code,
+                    time.perf_counter() - start,
+                    stats
+                )
+
+
+# Metrics of this worker, served at GET /metrics
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,83 @@
+"""
+Keyset (cursor-based) pagination helpers.
+Cursors are opaque, URL-safe tokens that encode the sort key of the last row
+of a page, so fetching page N costs the same as fetching page 1.
+"""
+
+import base64
+import json
+from typing import Any, List, Sequence
+from fastapi import HTTPException, status
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of a row into an opaque cursor.
+    
+    Args:
+        values: Sort key values, in the same order as the ORDER BY columns
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps(list(values), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Opaque cursor string
+        size: Expected number of sort key values
+        
+    Returns:
+        List of sort key values
+        
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        values = None
+    
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    
+    return values
+
+
+def keyset_filter(columns: Sequence[str], values: Sequence[Any], descending: bool = False) -> str:
+    """
+    Build a PostgREST `or` filter selecting rows strictly after a sort key.
+    
+    For columns (a, b, c) this produces the expansion of (a, b, c) > (x, y, z):
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    
+    Args:
+        columns: ORDER BY columns
+        values: Sort key of the last row already returned
+        descending: True if the listing is ordered descending
+        
+    Returns:
+        Filter string for the query builder's or_() method
+    """
+    op = 'lt' if descending else 'gt'
+    clauses = []
+    for i, column in enumerate(columns):
+        terms = [f'{columns[j]}.eq.{_quote(values[j])}' for j in range(i)]
+        terms.append(f'{column}.{op}.{_quote(values[i])}')
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ','.join(clauses)
+
+
+def _quote(value: Any) -> str:
+    """Quote a value so reserved characters survive PostgREST logic trees."""
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
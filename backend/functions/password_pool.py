@@ -0,0 +1,83 @@
+"""
+Dedicated worker pool for password hashing and verification.
+bcrypt deliberately takes hundreds of milliseconds per call; running it on a
+bounded thread pool keeps that cost off the event loop, so a login storm
+slows down logins instead of every chat and listing request in the worker.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+class PasswordWorkerPool:
+    """
+    Runs CPU-bound password work on a fixed number of threads.
+    
+    At most `workers` jobs run at once; further callers wait their turn, and
+    once `max_pending` callers are already waiting new ones are rejected with
+    503 instead of queueing without bound. bcrypt releases the GIL while
+    hashing, so the threads run in parallel.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = asyncio.Semaphore(workers)
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_pending_seen = 0
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func(*args) on the pool and await its result.
+        
+        Raises:
+            HTTPException: If too many password operations are already queued
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please try again shortly"
+            )
+        
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.pending -= 1
+        
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+    
+    def stats(self) -> dict:
+        """
+        Return queue depth and throughput counters for monitoring.
+        """
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Per-worker-process pool shared by registration and login
+password_pool = PasswordWorkerPool(settings.PASSWORD_POOL_WORKERS, settings.PASSWORD_POOL_MAX_PENDING)
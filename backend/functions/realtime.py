@@ -0,0 +1,148 @@
+"""
+In-process publish/subscribe hub for real-time delivery.
+Fans each published payload out to every subscriber of a topic through
+bounded per-subscriber queues, evicting subscribers that fall behind.
+
+Hubs are per worker process: subscribers only receive events published by
+the worker they are connected to.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from config import settings
+
+
+class Subscription:
+    """
+    A single subscriber's bounded queue of pending payloads.
+    owner identifies who subscribed (e.g. a user ID) so their subscriptions
+    can be revoked.
+    """
+    
+    def __init__(self, topic: str, queue_size: int, owner: Optional[str] = None):
+        self.topic = topic
+        self.owner = owner
+        self.evicted = False
+        self.revoked = False
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+    
+    def offer(self, payload: str) -> bool:
+        """
+        Queue a payload without waiting. Returns False if the queue is full.
+        """
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    def evict(self) -> None:
+        """
+        Drop pending payloads and wake the consumer with an end marker.
+        """
+        self.evicted = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+    
+    async def next(self) -> Optional[str]:
+        """
+        Wait for the next payload. Returns None once the subscription is evicted.
+        """
+        return await self._queue.get()
+
+
+class Hub:
+    """
+    Topic-based fan-out. publish() never blocks: a subscriber whose queue is
+    full is evicted instead of slowing down everyone else on the topic.
+    """
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.published = 0
+        self.delivered = 0
+        self.evictions = 0
+    
+    def subscribe(self, topic: str, owner: Optional[str] = None) -> Subscription:
+        """
+        Register a new subscriber for a topic.
+        """
+        subscription = Subscription(topic, self.queue_size, owner)
+        self._subscribers[topic].add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscriber. Safe to call more than once.
+        """
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.topic]
+    
+    def publish(self, topic: str, payload: str) -> int:
+        """
+        Fan a serialized payload out to every subscriber of a topic.
+        
+        Args:
+            topic: Topic to publish on
+            payload: Already-serialized message (serialized once for all subscribers)
+            
+        Returns:
+            Number of subscribers the payload was queued for
+        """
+        self.published += 1
+        delivered = 0
+        for subscription in list(self._subscribers.get(topic, ())):
+            if subscription.offer(payload):
+                delivered += 1
+            else:
+                # Slow consumer: evict rather than buffer without bound
+                subscription.evict()
+                self.unsubscribe(subscription)
+                self.evictions += 1
+        self.delivered += delivered
+        return delivered
+    
+    def revoke(self, topic: str, owner: Optional[str] = None) -> int:
+        """
+        End the subscriptions of a topic, or only those of one owner, e.g.
+        when a user leaves a session or the session is deleted. Consumers
+        get the end marker with revoked set.
+        
+        Returns:
+            Number of subscriptions revoked
+        """
+        revoked = 0
+        for subscription in list(self._subscribers.get(topic, ())):
+            if owner is None or subscription.owner == owner:
+                subscription.revoked = True
+                subscription.evict()
+                self.unsubscribe(subscription)
+                revoked += 1
+        return revoked
+    
+    def stats(self) -> dict:
+        """
+        Return subscriber and delivery counters for monitoring.
+        """
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "evictions": self.evictions,
+        }
+
+
+# Per-worker hub of chat messages, one topic per session ID
+chat_hub = Hub(settings.CHAT_WS_QUEUE_SIZE)
+
+# Per-worker hub of session listing changes, one topic per school
+session_event_hub = Hub(settings.SESSION_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,57 @@
+"""
+Fast response helpers for list endpoints.
+Serializes already-built response models straight to JSON and compresses
+large bodies, skipping FastAPI's validate-then-encode pass.
+"""
+
+from typing import List
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from models import StudySessionResponse, SessionParticipant, ChatMessageResponse
+
+
+# Serializers for the list endpoints. dump_json writes the models directly
+# in pydantic-core without validating them again.
+session_list_adapter = TypeAdapter(List[StudySessionResponse])
+participant_list_adapter = TypeAdapter(List[SessionParticipant])
+message_list_adapter = TypeAdapter(List[ChatMessageResponse])
+
+
+def json_list_response(adapter: TypeAdapter, items: list) -> Response:
+    """
+    Build a JSON response from a list of response models.
+
+    The routes that use this have already built typed models, so
+    re-validating them against response_model is wasted work.
+    """
+    return Response(content=adapter.dump_json(items), media_type='application/json')
+
+
+def json_model_response(model: BaseModel) -> Response:
+    """
+    Build a JSON response from a single, already-built response model.
+    """
+    return Response(content=model.model_dump_json(), media_type='application/json')
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses larger than minimum_size.
+
+    Server-Sent Events streams are passed through untouched: gzip buffers
+    the small event chunks and would hold them back from the browser.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 6):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] == 'http' and 'text/event-stream' not in Headers(scope=scope).get('accept', ''):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -0,0 +1,268 @@
+"""
+In-process full-text index of study sessions.
+Fallback for the Postgres tsvector search (SEARCH_BACKEND=memory, and the
+SQLite backend): each school's sessions are tokenized into an inverted index
+and ranked with BM25, so searches are answered from memory after one load
+per school.
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from models import SessionFilterRequest
+from storage.base import SessionRepository
+
+
+# Columns the index needs from study_sessions
+SEARCH_INDEX_COLUMNS = 'id, title, description, course_code, meeting_type, date, current_capacity, max_capacity'
+
+# Title and course code matches count more than description matches,
+# like the A/B weights of the Postgres search_vector
+FIELD_WEIGHTS = (('title', 2.0), ('course_code', 2.0), ('description', 1.0))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with'
+})
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase search terms, dropping stop words.
+    """
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class _SchoolIndex:
+    """Inverted index of one school's sessions"""
+
+    def __init__(self, rows: Iterable[dict]):
+        self.loaded_at = time.monotonic()
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        self.terms: Dict[str, set] = {}
+        self.docs: Dict[str, dict] = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: dict) -> None:
+        session_id = row['id']
+        if session_id in self.docs:
+            self.remove(session_id)
+        self.docs[session_id] = {
+            'course_code': row['course_code'],
+            'meeting_type': row['meeting_type'],
+            'date': row['date'],
+            'current_capacity': row['current_capacity'],
+            'max_capacity': row['max_capacity'],
+        }
+        length = 0.0
+        terms = set()
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(row.get(field)):
+                self.postings[term][session_id] = self.postings[term].get(session_id, 0.0) + weight
+                terms.add(term)
+                length += weight
+        self.lengths[session_id] = length
+        self.total_length += length
+        self.terms[session_id] = terms
+
+    def remove(self, session_id: str) -> None:
+        if self.docs.pop(session_id, None) is None:
+            return
+        self.total_length -= self.lengths.pop(session_id, 0.0)
+        for term in self.terms.pop(session_id, ()):
+            postings = self.postings[term]
+            postings.pop(session_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def _matches(self, session_id: str, filters: SessionFilterRequest) -> bool:
+        doc = self.docs[session_id]
+        if filters.course_code and doc['course_code'] != filters.course_code:
+            return False
+        if filters.meeting_type and doc['meeting_type'] != filters.meeting_type.value:
+            return False
+        if filters.date_from and doc['date'] < filters.date_from:
+            return False
+        if filters.date_to and doc['date'] > filters.date_to:
+            return False
+        if filters.exclude_full and doc['current_capacity'] >= doc['max_capacity']:
+            return False
+        return True
+
+    def search(
+        self,
+        terms: List[str],
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[Tuple[float, str]]
+    ) -> List[Tuple[float, str]]:
+        """
+        Score the sessions containing all terms and return the best page
+        after the given (score, session_id) position.
+        """
+        if not terms or not self.docs:
+            return []
+        postings = [self.postings.get(term) for term in terms]
+        if not all(postings):
+            return []
+
+        count = len(self.docs)
+        average_length = (self.total_length / count) or 1.0
+        weighted = [
+            (term_postings, math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5)))
+            for term_postings in postings
+        ]
+        # Intersect starting from the rarest term
+        candidates = set(min(postings, key=len))
+        for term_postings in postings:
+            candidates.intersection_update(term_postings)
+
+        results = []
+        for session_id in candidates:
+            if not self._matches(session_id, filters):
+                continue
+            norm = K1 * (1 - B + B * self.lengths[session_id] / average_length)
+            score = 0.0
+            for term_postings, idf in weighted:
+                frequency = term_postings[session_id]
+                score += idf * frequency * (K1 + 1) / (frequency + norm)
+            score = round(score, 6)
+            if after is not None and not (score < after[0] or (score == after[0] and session_id > after[1])):
+                continue
+            results.append((score, session_id))
+
+        return heapq.nsmallest(limit, results, key=lambda result: (-result[0], result[1]))
+
+
+class SessionSearchIndex:
+    """
+    Per-school inverted indexes, loaded on first search and kept current by
+    the same hooks that maintain the listing cache. Each school is reloaded
+    after ttl_seconds so changes made by other workers show up.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._schools: Dict[str, _SchoolIndex] = {}
+        self._lock = threading.Lock()
+
+    def is_loaded(self, school: str) -> bool:
+        """
+        Whether the school's index is present and fresh.
+        """
+        index = self._schools.get(school)
+        return index is not None and time.monotonic() - index.loaded_at < self.ttl_seconds
+
+    def load(self, school: str, rows: Iterable[dict]) -> None:
+        """
+        Replace the school's index with the given session rows.
+        """
+        index = _SchoolIndex(rows)
+        with self._lock:
+            self._schools[school] = index
+
+    def add(self, school: str, row: dict) -> None:
+        """
+        Index a new session, if the school is loaded.
+        """
+        with self._lock:
+            index = self._schools.get(school)
+            if index is not None:
+                index.add(row)
+
+    def remove(self, school: str, session_id: str) -> None:
+        """
+        Drop a deleted session, if the school is loaded.
+        """
+        with self._lock:
+            index = self._schools.get(school)
+            if index is not None:
+                index.remove(session_id)
+
+    def patch_capacity(self, school: str, session_id: str, current_capacity: int) -> None:
+        """
+        Track a join or leave so exclude_full stays correct.
+        """
+        with self._lock:
+            index = self._schools.get(school)
+            if index is not None and session_id in index.docs:
+                index.docs[session_id]['current_capacity'] = current_capacity
+
+    def search(
+        self,
+        school: str,
+        query: str,
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[Tuple[float, str]] = None
+    ) -> List[Tuple[float, str]]:
+        """
+        Return one page of (score, session_id), ordered by score then id.
+
+        Args:
+            school: School whose sessions are searched
+            query: Search text; every term must match
+            filters: The listing's other filters
+            limit: Page size
+            after: (score, session_id) of the last result of the previous page
+        """
+        with self._lock:
+            index = self._schools.get(school)
+            if index is None:
+                return []
+            return index.search(tokenize(query), filters, limit, after)
+
+    async def search_school(
+        self,
+        sessions: SessionRepository,
+        school: str,
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[List]
+    ) -> List[Tuple[float, str]]:
+        """
+        Search a school for filters.search_term, first loading its index
+        with one list_search_rows query if it is missing or stale.
+
+        Args:
+            sessions: Session repository to load the school from
+            school: School whose sessions are searched
+            filters: Search term and the listing's other filters
+            limit: Page size
+            after: [score, session_id] of the last result of the previous page
+        """
+        if not self.is_loaded(school):
+            self.load(school, await sessions.list_search_rows(school))
+        return self.search(school, filters.search_term, filters, limit, tuple(after) if after else None)
+
+    def stats(self) -> dict:
+        """
+        Return indexed school and session counts for monitoring.
+        """
+        with self._lock:
+            return {
+                'schools': len(self._schools),
+                'sessions': sum(len(index.docs) for index in self._schools.values())
+            }
+
+
+# Per-worker search index, used when SEARCH_BACKEND is "memory" and by
+# storage backends without full-text search
+search_index = SessionSearchIndex(settings.SEARCH_INDEX_TTL_SECONDS)
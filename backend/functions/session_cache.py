@@ -0,0 +1,110 @@
+"""
+Per-school cache of session listing pages.
+Repeated GET /sessions/ reads are served from memory. Pages are keyed by
+the school's version token, which the database bumps on every session,
+participant or creator change, so a page is only served under the version
+it was built from, even when the write happened on another worker.
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from cache import TTLCache
+from config import settings
+from models import SessionFilterRequest, StudySessionResponse
+
+
+# A cached page: the sessions and the cursor for the next page
+ListingPage = Tuple[List[StudySessionResponse], Optional[str]]
+
+
+class SessionListingCache:
+    """
+    Listing pages keyed by school, filter set, page position and the
+    school's version token.
+    
+    A write moves the school to a new version, so older pages are never
+    read again; creating or deleting a session drops them right away
+    instead of leaving them to expire.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._pages = TTLCache(maxsize, ttl_seconds, on_remove=self._forget)
+        # Keys of the live pages of each school, pruned as pages leave the cache
+        self._keys_by_school: Dict[str, Set[Hashable]] = defaultdict(set)
+    
+    @staticmethod
+    def make_key(
+        school: str,
+        filters: Optional[SessionFilterRequest],
+        limit: int,
+        after: Optional[str],
+        version: str
+    ) -> Hashable:
+        """
+        Build the cache key for one listing page, as of a school version.
+        """
+        filter_key = None
+        if filters:
+            filter_key = (
+                filters.course_code,
+                filters.meeting_type.value if filters.meeting_type else None,
+                filters.date_from,
+                filters.date_to,
+                filters.exclude_full,
+                filters.search_term,
+            )
+        return (school, filter_key, limit, after, version)
+    
+    @staticmethod
+    def make_calendar_key(school: str, date_from: str, date_to: str, version: str) -> Hashable:
+        """
+        Build the cache key for one calendar window.
+        Shaped like a listing key, so school invalidation applies to
+        calendar windows too.
+        """
+        return (school, None, 'calendar', f'{date_from}/{date_to}', version)
+    
+    def get(self, key: Hashable) -> Optional[ListingPage]:
+        """
+        Return a cached page, or None on a miss.
+        """
+        page = self._pages.get(key)
+        if page is None:
+            return None
+        sessions, next_cursor = page
+        return list(sessions), next_cursor
+    
+    def set(self, key: Hashable, page: ListingPage) -> None:
+        """
+        Cache a page fetched from the database.
+        """
+        sessions, next_cursor = page
+        self._keys_by_school[key[0]].add(key)
+        self._pages.set(key, (list(sessions), next_cursor))
+    
+    def _forget(self, key: Hashable) -> None:
+        """Drop a page that left the cache from its school's key set"""
+        keys = self._keys_by_school.get(key[0])
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_school[key[0]]
+    
+    def invalidate_school(self, school: str) -> None:
+        """
+        Drop every cached page of a school (session created or deleted).
+        """
+        for key in self._keys_by_school.pop(school, set()):
+            self._pages.invalidate(key)
+    
+    def stats(self) -> dict:
+        """
+        Return size and hit/miss counters for monitoring.
+        """
+        return self._pages.stats()
+
+
+# Per-worker listing cache shared by all requests
+listing_cache = SessionListingCache(settings.LISTING_CACHE_SIZE, settings.LISTING_CACHE_TTL_SECONDS)
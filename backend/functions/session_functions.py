@@ -3,83 +3,259 @@ Study session business logic functions.
 Handles session creation, joining, filtering, and participant management.
 """
 
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
-from supabase import Client
 
-from models import StudySessionCreate, StudySessionResponse, SessionParticipant
+from models import (
+    StudySessionCreate,
+    StudySessionResponse,
+    RecurrenceFrequency,
+    SessionParticipant,
+    SessionFilterRequest,
+    CalendarDay,
+    SessionCalendarResponse,
+    JoinResult,
+    LeaveResult,
+    DeleteResult
+)
+from config import settings
+from functions.pagination import encode_cursor, decode_cursor
+from functions.user_functions import get_user_profile, user_display_name
+from functions.session_cache import listing_cache
+from functions.realtime import chat_hub, session_event_hub
+from functions.membership import membership_index
+from functions.search_index import search_index
+from storage import Storage
 
 
-async def create_session(
-    db: Client,
+# Sort key of the school listing, backed by idx_study_sessions_school_date_time_id
+SESSION_LISTING_ORDER = ('date', 'time', 'id')
+
+# Sort key of search results: relevance, best first, then id
+SEARCH_ORDER_SIZE = 2
+
+# Sort key of a session's participant list
+PARTICIPANT_ORDER = ('joined_at', 'user_id')
+
+# Days between occurrences of a recurring session
+RECURRENCE_INTERVALS = {
+    RecurrenceFrequency.WEEKLY: timedelta(weeks=1),
+    RecurrenceFrequency.BIWEEKLY: timedelta(weeks=2),
+}
+
+
+def _build_session_response(session: dict) -> StudySessionResponse:
+    """
+    Build a StudySessionResponse from a session listing row.
+    
+    Args:
+        session: study_sessions row with embedded creator and participant count
+        
+    Returns:
+        StudySessionResponse
+    """
+    creator = session.get('creator') or {'first_name': 'Unknown', 'last_name': 'User'}
+    current_capacity = session.get('current_capacity') or 0
+    
+    return StudySessionResponse(
+        id=session['id'],
+        title=session['title'],
+        course_code=session['course_code'],
+        description=session['description'],
+        date=session['date'],
+        time=session['time'],
+        location=session['location'],
+        meeting_type=session['meeting_type'],
+        max_capacity=session['max_capacity'],
+        current_capacity=current_capacity,
+        creator_id=session['creator_id'],
+        creator_name=f"{creator['first_name']} {creator['last_name']}",
+        created_at=datetime.fromisoformat(session['created_at']),
+        updated_at=datetime.fromisoformat(session['updated_at']),
+        is_full=current_capacity >= session['max_capacity']
+    )
+
+
+def publish_session_event(school: str, event: dict) -> None:
+    """
+    Push a listing change event to every SSE stream of a school.
+    
+    Args:
+        school: School whose listing changed
+        event: Event body; its "type" is session_created, session_deleted
+            or capacity_changed
+    """
+    session_event_hub.publish(school, json.dumps(event, separators=(',', ':'), default=str))
+
+
+def _capacity_changed(school: str, session_id: str, current_capacity: int, max_capacity: int) -> None:
+    """
+    Patch the search index and notify listeners after a join or leave.
+    """
+    search_index.patch_capacity(school, session_id, current_capacity)
+    publish_session_event(school, {
+        'type': 'capacity_changed',
+        'session_id': session_id,
+        'current_capacity': current_capacity,
+        'max_capacity': max_capacity,
+        'is_full': current_capacity >= max_capacity
+    })
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date: {value}"
+        )
+
+
+def _too_many_sessions() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"At most {settings.MAX_SESSIONS_PER_REQUEST} sessions can be created at once"
+    )
+
+
+def expand_occurrences(session_data: StudySessionCreate, limit: int) -> List[str]:
+    """
+    List the dates a session takes place on.
+    
+    A one-off session has just its own date. A recurring session repeats
+    weekly or biweekly from its date up to and including recurrence.until.
+    Expansion stops as soon as there are more than limit dates, so a far-off
+    until costs no more than the cap.
+    
+    Raises:
+        HTTPException: If a date is malformed, until is before the first
+            date, or there are more than limit occurrences
+    """
+    first = _parse_date(session_data.date)
+    if session_data.recurrence is None:
+        if limit < 1:
+            raise _too_many_sessions()
+        return [session_data.date]
+    
+    until = _parse_date(session_data.recurrence.until)
+    if until < first:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Recurrence must end on or after the session date"
+        )
+    
+    step = RECURRENCE_INTERVALS[session_data.recurrence.frequency]
+    dates = []
+    current = first
+    while current <= until:
+        if len(dates) == limit:
+            raise _too_many_sessions()
+        dates.append(current.isoformat())
+        try:
+            current += step
+        except OverflowError:
+            # Past date.max, so past until as well
+            break
+    return dates
+
+
+async def create_sessions(
+    db: Storage,
     creator_id: str,
-    session_data: StudySessionCreate
-) -> StudySessionResponse:
+    sessions: List[StudySessionCreate]
+) -> List[StudySessionResponse]:
     """
-    Create a new study session.
+    Create study sessions in bulk, expanding recurring ones into occurrences.
+    
+    All occurrences go in with one batched insert and the creator's
+    participant rows with a second one, so the round trips do not grow with
+    the number of sessions. The capacity trigger counts the creator in each.
     
     Args:
-        db: Supabase client
-        creator_id: ID of the user creating the session
-        session_data: Session details
+        db: Storage backend
+        creator_id: ID of the user creating the sessions
+        sessions: Session details, each optionally recurring
         
     Returns:
-        Created StudySessionResponse
+        Created sessions, in the order they were requested
         
     Raises:
-        HTTPException: If session creation fails
+        HTTPException: If the input is invalid or creation fails
     """
     try:
         # Get creator information
-        creator_response = db.table('users').select('first_name, last_name').eq('id', creator_id).execute()
-        if not creator_response.data:
+        creator = await get_user_profile(db, creator_id)
+        if not creator:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        creator = creator_response.data[0]
+        rows = []
         now = datetime.utcnow().isoformat()
-        
-        # Insert session into database
-        db_session_data = {
-            'title': session_data.title,
-            'course_code': session_data.course_code,
-            'description': session_data.description,
-            'date': session_data.date,
-            'time': session_data.time,
-            'location': session_data.location,
-            'meeting_type': session_data.meeting_type.value,
-            'max_capacity': session_data.max_capacity,
-            'creator_id': creator_id,
-            'created_at': now,
-            'updated_at': now
-        }
-        
-        response = db.table('study_sessions').insert(db_session_data).execute()
-        session = response.data[0]
-        
-        # Add creator as first participant
-        await add_participant(db, session['id'], creator_id)
-        
-        return StudySessionResponse(
-            id=session['id'],
-            title=session['title'],
-            course_code=session['course_code'],
-            description=session['description'],
-            date=session['date'],
-            time=session['time'],
-            location=session['location'],
-            meeting_type=session['meeting_type'],
-            max_capacity=session['max_capacity'],
-            current_capacity=1,
-            creator_id=session['creator_id'],
-            creator_name=f"{creator['first_name']} {creator['last_name']}",
-            created_at=datetime.fromisoformat(session['created_at']),
-            updated_at=datetime.fromisoformat(session['updated_at']),
-            is_full=session['max_capacity'] <= 1
-        )
+        for session_data in sessions:
+            remaining = settings.MAX_SESSIONS_PER_REQUEST - len(rows)
+            for occurrence in expand_occurrences(session_data, remaining):
+                rows.append({
+                    'title': session_data.title,
+                    'course_code': session_data.course_code,
+                    'description': session_data.description,
+                    'date': occurrence,
+                    'time': session_data.time,
+                    'location': session_data.location,
+                    'meeting_type': session_data.meeting_type.value,
+                    'max_capacity': session_data.max_capacity,
+                    'creator_id': creator_id,
+                    'school': creator['school'],
+                    'created_at': now,
+                    'updated_at': now
+                })
+        
+        inserted = await db.sessions.create_many(rows)
+        
+        # Add creator as first participant of every session
+        await db.participants.add_many([
+            {'session_id': session['id'], 'user_id': creator_id}
+            for session in inserted
+        ])
+        
+        # The school's cached listings no longer include every session
+        listing_cache.invalidate_school(creator['school'])
+        
+        created = []
+        for session in inserted:
+            membership_index.add(session['id'], creator_id)
+            search_index.add(creator['school'], {**session, 'current_capacity': 1})
+            created.append(StudySessionResponse(
+                id=session['id'],
+                title=session['title'],
+                course_code=session['course_code'],
+                description=session['description'],
+                date=session['date'],
+                time=session['time'],
+                location=session['location'],
+                meeting_type=session['meeting_type'],
+                max_capacity=session['max_capacity'],
+                current_capacity=1,
+                creator_id=session['creator_id'],
+                creator_name=user_display_name(creator),
+                created_at=datetime.fromisoformat(session['created_at']),
+                updated_at=datetime.fromisoformat(session['updated_at']),
+                is_full=session['max_capacity'] <= 1
+            ))
+        
+        for session in created:
+            publish_session_event(creator['school'], {
+                'type': 'session_created',
+                'session_id': session.id,
+                'session': session.model_dump(mode='json')
+            })
+        
+        return created
     
     except HTTPException:
         raise
@@ -90,12 +266,37 @@ async def create_session(
         )
 
 
-async def get_session_by_id(db: Client, session_id: str) -> StudySessionResponse:
+async def create_session(
+    db: Storage,
+    creator_id: str,
+    session_data: StudySessionCreate
+) -> StudySessionResponse:
+    """
+    Create a new study session.
+    
+    A recurring session creates every occurrence and returns the first.
+    
+    Args:
+        db: Storage backend
+        creator_id: ID of the user creating the session
+        session_data: Session details
+        
+    Returns:
+        Created StudySessionResponse
+        
+    Raises:
+        HTTPException: If session creation fails
+    """
+    created = await create_sessions(db, creator_id, [session_data])
+    return created[0]
+
+
+async def get_session_by_id(db: Storage, session_id: str) -> StudySessionResponse:
     """
     Retrieve a study session by ID.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         session_id: ID of the session
         
     Returns:
@@ -105,41 +306,16 @@ async def get_session_by_id(db: Client, session_id: str) -> StudySessionResponse
         HTTPException: If session not found
     """
     try:
-        response = db.table('study_sessions').select('*').eq('id', session_id).execute()
+        # Session, creator name and participant count in one round trip
+        session = await db.sessions.get(session_id)
         
-        if not response.data:
+        if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
         
-        session = response.data[0]
-        
-        # Get creator name
-        creator_response = db.table('users').select('first_name, last_name').eq('id', session['creator_id']).execute()
-        creator = creator_response.data[0]
-        
-        # Get current participant count
-        participants_response = db.table('session_participants').select('id', count='exact').eq('session_id', session_id).execute()
-        current_capacity = len(participants_response.data) if participants_response.data else 0
-        
-        return StudySessionResponse(
-            id=session['id'],
-            title=session['title'],
-            course_code=session['course_code'],
-            description=session['description'],
-            date=session['date'],
-            time=session['time'],
-            location=session['location'],
-            meeting_type=session['meeting_type'],
-            max_capacity=session['max_capacity'],
-            current_capacity=current_capacity,
-            creator_id=session['creator_id'],
-            creator_name=f"{creator['first_name']} {creator['last_name']}",
-            created_at=datetime.fromisoformat(session['created_at']),
-            updated_at=datetime.fromisoformat(session['updated_at']),
-            is_full=current_capacity >= session['max_capacity']
-        )
+        return _build_session_response(session)
     
     except HTTPException:
         raise
@@ -150,35 +326,42 @@ async def get_session_by_id(db: Client, session_id: str) -> StudySessionResponse
         )
 
 
-async def get_user_sessions(db: Client, user_id: str) -> List[StudySessionResponse]:
+async def get_user_sessions(db: Storage, user_id: str) -> List[StudySessionResponse]:
     """
     Get all sessions for a specific user (both created and joined).
     
+    Uses a fixed number of round trips regardless of how many sessions the
+    user is in: created sessions and joined session IDs are fetched
+    concurrently, then joined sessions are loaded with a single in_ lookup.
+    
     Args:
-        db: Supabase client
+        db: Storage backend
         user_id: ID of the user
         
     Returns:
         List of StudySessionResponse
     """
     try:
-        # Get sessions created by user
-        created_response = db.table('study_sessions').select('*').eq('creator_id', user_id).execute()
-        created_sessions = created_response.data if created_response.data else []
-        
-        # Get sessions joined by user
-        participated_response = db.table('session_participants').select('session_id').eq('user_id', user_id).execute()
-        participated_ids = [p['session_id'] for p in participated_response.data] if participated_response.data else []
+        # Get sessions created by user and sessions joined by user
+        created_sessions, participated_ids = await asyncio.gather(
+            db.sessions.list_by_creator(user_id),
+            db.participants.session_ids_for_user(user_id)
+        )
         
-        sessions = []
+        # Joined sessions not already covered by the created ones, deduplicated
+        joined_ids = []
+        seen_ids = {s['id'] for s in created_sessions}
         for session_id in participated_ids:
-            if session_id not in [s['id'] for s in created_sessions]:
-                session_response = await get_session_by_id(db, session_id)
-                sessions.append(session_response)
+            if session_id not in seen_ids:
+                seen_ids.add(session_id)
+                joined_ids.append(session_id)
+        
+        joined_sessions = []
+        if joined_ids:
+            joined_sessions = await db.sessions.get_many(joined_ids)
         
-        for session_data in created_sessions:
-            session_response = await get_session_by_id(db, session_data['id'])
-            sessions.append(session_response)
+        sessions = [_build_session_response(row) for row in joined_sessions]
+        sessions.extend(_build_session_response(row) for row in created_sessions)
         
         return sessions
     
@@ -189,61 +372,111 @@ async def get_user_sessions(db: Client, user_id: str) -> List[StudySessionRespon
         )
 
 
-async def get_school_sessions(db: Client, school: str, filters: Optional[dict] = None) -> List[StudySessionResponse]:
+async def _search_school_sessions(
+    db: Storage,
+    school: str,
+    filters: SessionFilterRequest,
+    limit: int,
+    after: Optional[str]
+) -> Tuple[List[StudySessionResponse], Optional[str]]:
     """
-    Get all available sessions for a school with optional filters.
+    Get one page of a school's sessions matching filters.search_term,
+    most relevant first.
+    
+    With SEARCH_BACKEND=postgres the storage backend ranks: on Supabase the
+    search_sessions database function ranks the GIN-indexed search_vector with
+    ts_rank, and SQLite falls back to the in-process index. With
+    SEARCH_BACKEND=memory the in-process inverted index always ranks, with
+    BM25, loading the school's sessions in one query the first time. Either
+    way one page of (rank, id) comes back, paged by keyset on (rank desc, id),
+    and the rows are fetched in one more round trip.
+    """
+    after_key = decode_cursor(after, SEARCH_ORDER_SIZE) if after else None
+    
+    if settings.SEARCH_BACKEND == 'memory':
+        ranked = await search_index.search_school(db.sessions, school, filters, limit, after_key)
+    else:
+        ranked = await db.sessions.search(school, filters, limit, after_key)
+    
+    if not ranked:
+        return [], None
+    
+    rows = await db.sessions.get_many([session_id for _, session_id in ranked])
+    rows_by_id = {row['id']: row for row in rows}
+    sessions = [_build_session_response(rows_by_id[session_id]) for _, session_id in ranked if session_id in rows_by_id]
+    
+    next_cursor = encode_cursor(list(ranked[-1])) if len(ranked) == limit else None
+    return sessions, next_cursor
+
+
+async def get_school_sessions(
+    db: Storage,
+    school: str,
+    filters: Optional[SessionFilterRequest] = None,
+    limit: int = 50,
+    after: Optional[str] = None,
+    version: Optional[str] = None
+) -> Tuple[List[StudySessionResponse], Optional[str]]:
+    """
+    Get one page of available sessions for a school with optional filters.
+    
+    Every filter is evaluated by the database: the school, course, meeting
+    type and date range as column filters, and fullness through the is_full
+    computed field. Pages are ordered by (date, time, id) within the school
+    and fetched by keyset on idx_study_sessions_school_date_time_id, so page N
+    costs the same as page 1.
+    With a search_term, pages are ordered by relevance instead; see
+    _search_school_sessions.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         school: School name
-        filters: Optional filters (course_code, meeting_type, date_from, date_to)
+        filters: Optional filters (course_code, meeting_type, date_from, date_to,
+            search_term, exclude_full)
+        limit: Maximum number of sessions to return
+        after: Cursor returned with the previous page
+        version: School version token read before the call (see
+            get_school_sessions_version). Pages are cached under it, so a
+            cached page is only served for the version it was built from;
+            without it the cache is skipped.
         
     Returns:
-        List of StudySessionResponse
+        Tuple of (list of StudySessionResponse, cursor for the next page or None)
     """
     try:
+        # Serve repeated reads of the same school version from the listing cache
+        cache_key = None
+        if version is not None:
+            cache_key = listing_cache.make_key(school, filters, limit, after, version)
+            cached_page = listing_cache.get(cache_key)
+            if cached_page is not None:
+                return cached_page
+        
+        if filters and filters.search_term:
+            page = await _search_school_sessions(db, school, filters, limit, after)
+            if cache_key is not None:
+                listing_cache.set(cache_key, page)
+            return page
+        
         print(f"[GET_SCHOOL_SESSIONS] Fetching sessions for school: {school}")
         
-        # Get all users from the school
-        users_response = db.table('users').select('id').eq('school', school).execute()
-        user_ids = [u['id'] for u in users_response.data] if users_response.data else []
-        print(f"[GET_SCHOOL_SESSIONS] Found {len(user_ids)} users from {school}")
-        
-        if not user_ids:
-            print(f"[GET_SCHOOL_SESSIONS] No users found for school {school}, returning empty list")
-            return []
-        
-        # Get all sessions created by users from this school
-        sessions = []
-        
-        # Query all sessions and filter by creator_id
-        all_sessions_response = db.table('study_sessions').select('*').execute()
-        print(f"[GET_SCHOOL_SESSIONS] Total sessions in database: {len(all_sessions_response.data) if all_sessions_response.data else 0}")
-        
-        if all_sessions_response.data:
-            for session_data in all_sessions_response.data:
-                # Only include sessions created by users from this school
-                if session_data['creator_id'] not in user_ids:
-                    continue
-                    
-                # Apply filters
-                if filters:
-                    if filters.get('course_code') and session_data['course_code'] != filters['course_code']:
-                        continue
-                    if filters.get('meeting_type') and session_data['meeting_type'] != filters['meeting_type']:
-                        continue
-                    if filters.get('exclude_full'):
-                        participants_response = db.table('session_participants').select('id', count='exact').eq('session_id', session_data['id']).execute()
-                        current_capacity = len(participants_response.data) if participants_response.data else 0
-                        if current_capacity >= session_data['max_capacity']:
-                            continue
-                
-                session_response = await get_session_by_id(db, session_data['id'])
-                sessions.append(session_response)
-        
-        print(f"[GET_SCHOOL_SESSIONS] Returning {len(sessions)} sessions after filtering")
-        return sessions
+        after_key = decode_cursor(after, len(SESSION_LISTING_ORDER)) if after else None
+        rows = await db.sessions.list_school(school, filters, limit, after_key)
+        sessions = [_build_session_response(row) for row in rows]
+        
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor([last[column] for column in SESSION_LISTING_ORDER])
+        
+        if cache_key is not None:
+            listing_cache.set(cache_key, (sessions, next_cursor))
+        
+        print(f"[GET_SCHOOL_SESSIONS] Returning {len(sessions)} sessions for {school}")
+        return sessions, next_cursor
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[GET_SCHOOL_SESSIONS] Exception: {str(e)}")
         raise HTTPException(
@@ -252,53 +485,189 @@ async def get_school_sessions(db: Client, school: str, filters: Optional[dict] =
         )
 
 
-async def add_participant(db: Client, session_id: str, user_id: str) -> None:
+async def get_school_calendar(
+    db: Storage,
+    school: str,
+    date_from: str,
+    date_to: str,
+    version: Optional[str] = None
+) -> SessionCalendarResponse:
+    """
+    Get a school's sessions between two dates, grouped by day.
+    
+    study_sessions carries its school and a generated starts_at timestamp,
+    indexed together, so a week or month view is one range scan of
+    idx_study_sessions_school_starts_at. Windows are cached with the
+    school's listing pages, under the same version token, and invalidated
+    with them.
+    
+    Args:
+        db: Storage backend
+        school: School name
+        date_from: First day of the window (YYYY-MM-DD)
+        date_to: Last day of the window (YYYY-MM-DD)
+        version: School version token read before the call; without it
+            the cache is skipped
+        
+    Returns:
+        SessionCalendarResponse with one entry per day of the window
+        
+    Raises:
+        HTTPException: If the window is invalid or too long
+    """
+    first = _parse_date(date_from)
+    last = _parse_date(date_to)
+    if last < first:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The calendar must end on or after its first day"
+        )
+    span = (last - first).days + 1
+    if span > settings.MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The calendar can span at most {settings.MAX_CALENDAR_DAYS} days"
+        )
+    
+    try:
+        cache_key = None
+        cached_page = None
+        if version is not None:
+            cache_key = listing_cache.make_calendar_key(school, first.isoformat(), last.isoformat(), version)
+            cached_page = listing_cache.get(cache_key)
+        if cached_page is not None:
+            sessions = cached_page[0]
+        else:
+            rows = await db.sessions.list_school_window(
+                school, first.isoformat(), (last + timedelta(days=1)).isoformat()
+            )
+            sessions = [_build_session_response(row) for row in rows]
+            if cache_key is not None:
+                listing_cache.set(cache_key, (sessions, None))
+        
+        days = {(first + timedelta(days=offset)).isoformat(): [] for offset in range(span)}
+        for session in sessions:
+            if session.date in days:
+                days[session.date].append(session)
+        
+        return SessionCalendarResponse(
+            date_from=first.isoformat(),
+            date_to=last.isoformat(),
+            days=[CalendarDay(date=day, sessions=day_sessions) for day, day_sessions in days.items()]
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve calendar: {str(e)}"
+        )
+
+
+async def get_session_version(db: Storage, session_id: str) -> str:
+    """
+    Version token of a single session, for its ETag.
+    
+    Combines the session's version counter, which the capacity trigger bumps
+    on every join and leave, with the creator's updated_at so a renamed
+    creator also changes it.
+    
+    Raises:
+        HTTPException: If session not found
+    """
+    try:
+        version = await db.sessions.version(session_id)
+        
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        
+        return version
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve session: {str(e)}"
+        )
+
+
+async def get_school_sessions_version(db: Storage, school: str) -> str:
+    """
+    Version token of a school's session listing, for its ETag.
+    Changes whenever a session of the school is created, deleted, joined or
+    left, or its creator is renamed. The database keeps it in a per-school
+    counter, so reading it is one row lookup.
+    """
+    try:
+        return await db.sessions.school_version(school)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve school sessions: {str(e)}"
+        )
+
+
+async def get_user_sessions_version(db: Storage, user_id: str) -> str:
+    """
+    Version token of the sessions a user created or joined, for its ETag.
+    """
+    try:
+        return await db.sessions.user_version(user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve user sessions: {str(e)}"
+        )
+
+
+async def add_participant(db: Storage, session_id: str, user_id: str) -> JoinResult:
     """
     Add a user to a study session.
     
+    The existence, membership and capacity checks and the insert all happen
+    in one atomic storage call (the join_session database function on
+    Supabase), under a lock on the session, so concurrent joins cannot
+    overfill it.
+    
     Args:
-        db: Supabase client
+        db: Storage backend
         session_id: ID of the session
         user_id: ID of the user to add
         
+    Returns:
+        JoinResult.JOINED
+        
     Raises:
-        HTTPException: If session is full or user already joined
+        HTTPException: If session is not found, is full, or user already joined
     """
     try:
-        # Check if session exists and get details
-        session_response = db.table('study_sessions').select('max_capacity').eq('id', session_id).execute()
-        if not session_response.data:
+        outcome = await db.participants.join(session_id, user_id)
+        result = JoinResult(outcome['status'])
+        
+        if result == JoinResult.NOT_FOUND:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
-        
-        session = session_response.data[0]
-        
-        # Check if user is already a participant
-        existing = db.table('session_participants').select('id').eq('session_id', session_id).eq('user_id', user_id).execute()
-        if existing.data:
+        if result == JoinResult.ALREADY_MEMBER:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User already joined this session"
             )
-        
-        # Check current capacity
-        participants = db.table('session_participants').select('id', count='exact').eq('session_id', session_id).execute()
-        current_count = len(participants.data) if participants.data else 0
-        
-        if current_count >= session['max_capacity']:
+        if result == JoinResult.FULL:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Session is full"
             )
         
-        # Add participant
-        db.table('session_participants').insert({
-            'session_id': session_id,
-            'user_id': user_id,
-            'joined_at': datetime.utcnow().isoformat()
-        }).execute()
+        membership_index.add(session_id, user_id)
+        _capacity_changed(outcome['school'], session_id, outcome['current_capacity'], outcome['max_capacity'])
+        return result
     
     except HTTPException:
         raise
@@ -309,29 +678,45 @@ async def add_participant(db: Client, session_id: str, user_id: str) -> None:
         )
 
 
-async def remove_participant(db: Client, session_id: str, user_id: str) -> None:
+async def remove_participant(db: Storage, session_id: str, user_id: str) -> LeaveResult:
     """
     Remove a user from a study session (leave session).
     
+    Runs as one atomic storage call (the leave_session database function on
+    Supabase).
+    Leaving a session the user is not in is not an error.
+    
     Args:
-        db: Supabase client
+        db: Storage backend
         session_id: ID of the session
         user_id: ID of the user to remove
         
+    Returns:
+        LeaveResult.LEFT or LeaveResult.NOT_MEMBER
+        
     Raises:
-        HTTPException: If user is not in session or is the creator
+        HTTPException: If the session is not found or the user is the creator
     """
     try:
-        # Check if user is the creator
-        session = db.table('study_sessions').select('creator_id').eq('id', session_id).execute()
-        if session.data and session.data[0]['creator_id'] == user_id:
+        outcome = await db.participants.leave(session_id, user_id)
+        result = LeaveResult(outcome['status'])
+        
+        if result == LeaveResult.NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        if result == LeaveResult.CREATOR:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Creator cannot leave their own session"
             )
         
-        # Remove participant
-        db.table('session_participants').delete().eq('session_id', session_id).eq('user_id', user_id).execute()
+        if result == LeaveResult.LEFT:
+            membership_index.remove(session_id, user_id)
+            chat_hub.revoke(session_id, user_id)
+            _capacity_changed(outcome['school'], session_id, outcome['current_capacity'], outcome['max_capacity'])
+        return result
     
     except HTTPException:
         raise
@@ -342,55 +727,128 @@ async def remove_participant(db: Client, session_id: str, user_id: str) -> None:
         )
 
 
-async def delete_session(db: Client, session_id: str, creator_id: str) -> None:
+async def delete_session(db: Storage, session_id: str, creator_id: str) -> None:
     """
     Delete a study session. Only the creator is allowed to delete.
+    
+    Runs as one atomic storage call (the delete_study_session database
+    function on Supabase), so the ownership check and the delete happen in
+    one round trip and one transaction.
+    Participants and chat messages go with the session through the
+    ON DELETE CASCADE foreign keys.
+    
+    Raises:
+        HTTPException: If the session is not found or the caller is not the creator
     """
     try:
-        # Verify creator
-        session = db.table('study_sessions').select('creator_id').eq('id', session_id).execute()
-        if not session.data:
+        outcome = await db.sessions.delete(session_id, creator_id)
+        result = DeleteResult(outcome['status'])
+        
+        if result == DeleteResult.NOT_FOUND:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-        if session.data[0]['creator_id'] != creator_id:
+        if result == DeleteResult.FORBIDDEN:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the creator can delete this session")
+        
+        membership_index.invalidate(session_id)
+        chat_hub.revoke(session_id)
+        
+        school = outcome['school']
+        listing_cache.invalidate_school(school)
+        search_index.remove(school, session_id)
+        publish_session_event(school, {'type': 'session_deleted', 'session_id': session_id})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to delete session: {str(e)}")
 
-        # Delete participants first, then the session
-        db.table('session_participants').delete().eq('session_id', session_id).execute()
-        db.table('study_sessions').delete().eq('id', session_id).execute()
+
+async def check_session_creator(db: Storage, session_id: str, user_id: str) -> None:
+    """
+    Make sure a session exists and was created by the given user.
+    
+    Raises:
+        HTTPException: If the session is not found or the user is not the creator
+    """
+    try:
+        session_creator_id = await db.sessions.get_creator_id(session_id)
+        if session_creator_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+        if session_creator_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the creator can delete this session")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to delete session: {str(e)}")
 
-async def get_session_participants(db: Client, session_id: str) -> List[SessionParticipant]:
+
+async def purge_and_delete_session(db: Storage, session_id: str, creator_id: str) -> None:
     """
-    Get all participants in a study session.
+    Background task that deletes a session with a very large chat history.
+    
+    Messages are removed in batches of MESSAGE_PURGE_BATCH_SIZE (the
+    purge_session_messages database function on Supabase), so no single
+    statement has to cascade through the whole history. The session itself
+    is then deleted with delete_session. Errors are logged, since there is
+    no caller left to report them to.
+    """
+    batch_size = settings.MESSAGE_PURGE_BATCH_SIZE
+    try:
+        while True:
+            if await db.messages.purge(session_id, batch_size) < batch_size:
+                break
+        await delete_session(db, session_id, creator_id)
+    except HTTPException as e:
+        print(f"[DELETE] Background delete of session {session_id} failed: {e.detail}")
+    except Exception as e:
+        print(f"[DELETE] Background delete of session {session_id} failed: {str(e)}")
+
+
+async def get_session_participants(
+    db: Storage,
+    session_id: str,
+    limit: Optional[int] = None,
+    after: Optional[str] = None
+) -> Tuple[List[SessionParticipant], Optional[str]]:
+    """
+    Get the participants in a study session.
+    
+    User details are embedded in the participants query, so the whole list
+    costs a single round trip regardless of session size. Large sessions can
+    be paged by (joined_at, user_id) keyset.
     
     Args:
-        db: Supabase client
+        db: Storage backend
         session_id: ID of the session
+        limit: Optional maximum number of participants to return
+        after: Cursor returned with the previous page
         
     Returns:
-        List of SessionParticipant
+        Tuple of (list of SessionParticipant, cursor for the next page or None)
     """
     try:
-        participants_response = db.table('session_participants').select('user_id, joined_at').eq('session_id', session_id).execute()
+        after_key = decode_cursor(after, len(PARTICIPANT_ORDER)) if after else None
+        rows = await db.participants.list(session_id, limit, after_key)
         
         participants = []
-        for p in participants_response.data if participants_response.data else []:
-            user_response = db.table('users').select('id, first_name, last_name, email').eq('id', p['user_id']).execute()
-            if user_response.data:
-                user = user_response.data[0]
-                participants.append(SessionParticipant(
-                    id=user['id'],
-                    first_name=user['first_name'],
-                    last_name=user['last_name'],
-                    email=user['email'],
-                    joined_at=datetime.fromisoformat(p['joined_at'])
-                ))
-        
-        return participants
+        for p in rows:
+            user = p['user']
+            participants.append(SessionParticipant(
+                id=user['id'],
+                first_name=user['first_name'],
+                last_name=user['last_name'],
+                email=user['email'],
+                joined_at=datetime.fromisoformat(p['joined_at'])
+            ))
+        
+        next_cursor = None
+        if limit and len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor([last[column] for column in PARTICIPANT_ORDER])
+        
+        return participants, next_cursor
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
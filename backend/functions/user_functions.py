@@ -0,0 +1,163 @@
+"""
+User profile lookup and update functions.
+Serves the small, rarely changing user lookups made on almost every request
+(names and school) from an in-process cache.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from fastapi import HTTPException, status
+
+from cache import TTLCache
+from config import settings
+from models import UserProfile, UserUpdate
+from storage import Storage
+
+
+# Columns cached for every user
+USER_PROFILE_FIELDS = ('id', 'email', 'first_name', 'last_name', 'school')
+
+# Per-worker cache of user rows keyed by user ID
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+
+def user_display_name(user: Optional[dict]) -> str:
+    """
+    Format a user's display name.
+    
+    Args:
+        user: User row with first_name and last_name, or None
+        
+    Returns:
+        "First Last", or "Unknown User" if the user does not exist
+    """
+    if not user:
+        return "Unknown User"
+    return f"{user['first_name']} {user['last_name']}"
+
+
+async def get_user_profile(db: Storage, user_id: str) -> Optional[dict]:
+    """
+    Get a user's id, email, name and school, served from cache when possible.
+    
+    Args:
+        db: Storage backend
+        user_id: ID of the user
+        
+    Returns:
+        User row as a dict, or None if the user does not exist
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    user = await db.users.get_profile(user_id)
+    if user is None:
+        return None
+    
+    user_cache.set(user_id, user)
+    return user
+
+
+async def get_user_profiles(db: Storage, user_ids: Iterable[str]) -> Dict[str, dict]:
+    """
+    Get the profiles of several users at once.
+    
+    Cached users are served from memory; the remaining ones are fetched with
+    a single query, so the cost depends on the number of distinct users
+    rather than on how many times each appears.
+    
+    Args:
+        db: Storage backend
+        user_ids: IDs of the users (duplicates are ignored)
+        
+    Returns:
+        Dict mapping user ID to user row, for users that exist
+    """
+    users = {}
+    missing = []
+    for user_id in set(user_ids):
+        user = user_cache.get(user_id)
+        if user is not None:
+            users[user_id] = user
+        else:
+            missing.append(user_id)
+    
+    if missing:
+        for user in await db.users.get_profiles(missing):
+            user_cache.set(user['id'], user)
+            users[user['id']] = user
+    
+    return users
+
+
+def cache_user(user: dict) -> None:
+    """
+    Seed the cache from a users row that was already fetched (e.g. at login).
+    
+    Args:
+        user: users row containing at least the cached columns
+    """
+    user_cache.set(user['id'], {field: user[field] for field in USER_PROFILE_FIELDS})
+
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Drop a user's cached profile. Call whenever the user's row changes.
+    
+    Args:
+        user_id: ID of the user
+    """
+    user_cache.invalidate(user_id)
+
+
+async def update_user_profile(db: Storage, user_id: str, update_data: UserUpdate) -> UserProfile:
+    """
+    Update a user's profile and invalidate the cached copy.
+    
+    Args:
+        db: Storage backend
+        user_id: ID of the user
+        update_data: Fields to change (unset fields are left untouched)
+        
+    Returns:
+        Updated UserProfile
+        
+    Raises:
+        HTTPException: If the user does not exist or the update fails
+    """
+    changes = update_data.model_dump(exclude_unset=True)
+    
+    try:
+        if changes:
+            changes['updated_at'] = datetime.utcnow().isoformat()
+            user = await db.users.update(user_id, changes)
+        else:
+            user = await db.users.get(user_id)
+        
+        invalidate_user(user_id)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        return UserProfile(
+            id=user['id'],
+            email=user['email'],
+            first_name=user['first_name'],
+            last_name=user['last_name'],
+            school=user['school'],
+            created_at=datetime.fromisoformat(user['created_at']),
+            bio=user.get('bio'),
+            rating=user.get('rating')
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update profile: {str(e)}"
+        )
@@ -4,8 +4,9 @@ Initializes the FastAPI server and includes all routes.
 Configured for CORS to allow frontend communication.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import sys
@@ -18,6 +19,15 @@ from routes.auth_route import router as auth_router
 from routes.sessions import router as sessions_router
 from routes.chat_route import router as chat_router
 from config import settings
+from storage import init_storage, close_storage
+from functions.user_functions import user_cache
+from functions.session_cache import listing_cache
+from functions.membership import membership_index
+from functions.search_index import search_index
+from functions.realtime import chat_hub, session_event_hub
+from functions.password_pool import password_pool
+from functions.responses import CompressionMiddleware
+from functions.metrics import MetricsMiddleware, metrics_registry, METRICS_CONTENT_TYPE
 
 # Create FastAPI application instance
 app = FastAPI(
@@ -25,7 +35,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Backend API for StudyMate - A study session coordination platform",
     docs_url="/api/docs",  # Swagger UI documentation
-    redoc_url="/api/redoc"  # ReDoc documentation
+    redoc_url="/api/redoc",  # ReDoc documentation
+    default_response_class=ORJSONResponse  # orjson instead of the stdlib json encoder
 )
 
 # Configure CORS (Cross-Origin Resource Sharing)
@@ -36,8 +47,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag"],
 )
 
+# Compress large JSON bodies (session listings, chat history)
+if settings.RESPONSE_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        compresslevel=settings.COMPRESSION_LEVEL,
+    )
+
+# Per-route request and database metrics, outermost so they time everything
+if settings.METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        registry=metrics_registry,
+        server_timing=settings.SERVER_TIMING,
+    )
+
 # Include all routers
 # Auth routes: /auth/*
 app.include_router(auth_router)
@@ -61,7 +89,8 @@ def root():
         "message": "Welcome to StudyMate API",
         "version": settings.APP_VERSION,
         "docs": "/api/docs",
-        "health": "/health"
+        "health": "/health",
+        "metrics": "/metrics"
     }
 
 
@@ -74,10 +103,31 @@ def health_check():
     return {
         "status": "healthy",
         "service": settings.APP_NAME,
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "storage": settings.STORAGE_BACKEND,
+        "caches": {
+            "users": user_cache.stats(),
+            "session_listings": listing_cache.stats(),
+            "memberships": membership_index.stats(),
+            "search_index": search_index.stats()
+        },
+        "password_pool": password_pool.stats(),
+        "realtime": {
+            "chat": chat_hub.stats(),
+            "session_events": session_event_hub.stats()
+        }
     }
 
 
+@app.get("/metrics", tags=["General"])
+def metrics():
+    """
+    Prometheus metrics of this worker: requests, latency and database
+    queries, time and rows per route.
+    """
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # ==================== ERROR HANDLERS ====================
 
 @app.exception_handler(404)
@@ -102,6 +152,8 @@ async def startup_event():
     """
     print(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"Debug mode: {settings.DEBUG}")
+    await init_storage()
+    print(f"Storage backend: {settings.STORAGE_BACKEND}")
     print("Backend is ready to handle requests!")
 
 
@@ -112,6 +164,7 @@ async def shutdown_event():
     Use for cleanup tasks.
     """
     print("Shutting down backend...")
+    await close_storage()
 
 
 if __name__ == "__main__":
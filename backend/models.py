@@ -3,11 +3,13 @@ Pydantic models for request/response validation and database schema representati
 These models ensure type safety and automatic validation for all API endpoints.
 """
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 
+from config import settings
+
 
 # ==================== AUTHENTICATION MODELS ====================
 
@@ -69,17 +71,52 @@ class UserProfile(BaseModel):
     rating: Optional[float] = None  # Average rating from study session reviews
 
 
+class Principal(BaseModel):
+    """
+    The authenticated user making a request.
+    Built from access token claims, so resolving it needs no database query.
+    """
+    id: str = Field(..., description="User ID")
+    email: str = Field(..., description="User's email")
+    school: str = Field(..., description="User's school")
+    name: str = Field(..., description="User's display name")
+
+
 class UserUpdate(BaseModel):
     """
     Model for updating user profile information.
+    Omitted fields are left unchanged; bio may be set to null to clear it,
+    names may not.
     """
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     bio: Optional[str] = None
 
+    @field_validator('first_name', 'last_name')
+    @classmethod
+    def name_not_null(cls, value: Optional[str]) -> str:
+        if value is None:
+            raise ValueError('may not be null')
+        return value
+
 
 # ==================== STUDY SESSION MODELS ====================
 
+class RecurrenceFrequency(str, Enum):
+    """How often a recurring study session repeats"""
+    WEEKLY = "weekly"
+    BIWEEKLY = "biweekly"
+
+
+class SessionRecurrence(BaseModel):
+    """
+    Repeat a study session at a fixed interval.
+    The first occurrence is the session's own date.
+    """
+    frequency: RecurrenceFrequency = Field(..., description="weekly or biweekly")
+    until: str = Field(..., description="Last possible date of an occurrence (ISO format: YYYY-MM-DD)")
+
+
 class StudySessionCreate(BaseModel):
     """
     Model for creating a new study session.
@@ -93,6 +130,17 @@ class StudySessionCreate(BaseModel):
     location: str = Field(..., description="Physical location or 'Online'")
     meeting_type: MeetingType = Field(..., description="Type of meeting: in_person, online, or hybrid")
     max_capacity: int = Field(..., gt=0, description="Maximum number of participants")
+    recurrence: Optional[SessionRecurrence] = Field(None, description="Repeat the session until a date")
+
+
+class BulkSessionCreate(BaseModel):
+    """
+    Model for creating several study sessions in one request.
+    Each entry may itself be recurring.
+    """
+    sessions: List[StudySessionCreate] = Field(
+        ..., min_length=1, max_length=settings.MAX_SESSIONS_PER_REQUEST, description="Sessions to create"
+    )
 
 
 class StudySessionUpdate(BaseModel):
@@ -131,6 +179,24 @@ class StudySessionResponse(BaseModel):
     is_full: bool = Field(..., description="Whether the session has reached max capacity")
 
 
+class CalendarDay(BaseModel):
+    """
+    One day of the session calendar.
+    """
+    date: str = Field(..., description="Day (YYYY-MM-DD)")
+    sessions: List[StudySessionResponse] = Field(..., description="Sessions on this day, by start time")
+
+
+class SessionCalendarResponse(BaseModel):
+    """
+    Sessions of a school grouped by day over a date window.
+    Every day of the window is listed, including days without sessions.
+    """
+    date_from: str
+    date_to: str
+    days: List[CalendarDay]
+
+
 # ==================== PARTICIPANT MODELS ====================
 
 class SessionParticipant(BaseModel):
@@ -144,6 +210,29 @@ class SessionParticipant(BaseModel):
     joined_at: datetime
 
 
+class JoinResult(str, Enum):
+    """Outcome of an atomic join attempt"""
+    JOINED = "joined"
+    ALREADY_MEMBER = "already_member"
+    FULL = "full"
+    NOT_FOUND = "not_found"
+
+
+class LeaveResult(str, Enum):
+    """Outcome of an atomic leave attempt"""
+    LEFT = "left"
+    NOT_MEMBER = "not_member"
+    CREATOR = "creator"
+    NOT_FOUND = "not_found"
+
+
+class DeleteResult(str, Enum):
+    """Outcome of an atomic session delete"""
+    DELETED = "deleted"
+    FORBIDDEN = "forbidden"
+    NOT_FOUND = "not_found"
+
+
 class JoinSessionRequest(BaseModel):
     """
     Request model for joining a study session.
@@ -185,7 +274,7 @@ class SessionFilterRequest(BaseModel):
     meeting_type: Optional[MeetingType] = None
     date_from: Optional[str] = None
     date_to: Optional[str] = None
-    search_term: Optional[str] = None  # Search in title and description
+    search_term: Optional[str] = None  # Search in title, description and course code
     exclude_full: bool = Field(default=False, description="Exclude full sessions")
 
 
@@ -5,9 +5,11 @@ Provides endpoints for account creation and credential verification.
 
 from fastapi import APIRouter, HTTPException, status, Depends
 
-from models import RegisterRequest, LoginRequest, AuthResponse
-from supabase_client import get_supabase_client
+from models import RegisterRequest, LoginRequest, AuthResponse, UserProfile, UserUpdate, Principal
+from storage import get_storage
 from functions.auth_functions import register_user, login_user
+from functions.user_functions import update_user_profile
+from dependencies import get_current_user
 
 # Create router for authentication endpoints
 router = APIRouter(
@@ -24,7 +26,7 @@ router = APIRouter(
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     register_data: RegisterRequest,
-    db = Depends(get_supabase_client)
+    db = Depends(get_storage)
 ) -> AuthResponse:
     """
     Register a new user account.
@@ -43,7 +45,7 @@ async def register(
 @router.post("/login", response_model=AuthResponse)
 async def login(
     login_data: LoginRequest,
-    db = Depends(get_supabase_client)
+    db = Depends(get_storage)
 ) -> AuthResponse:
     """
     Login with email and password.
@@ -56,6 +58,24 @@ async def login(
     return await login_user(db, login_data.email, login_data.password)
 
 
+@router.patch("/me", response_model=UserProfile)
+async def update_profile(
+    update_data: UserUpdate,
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
+) -> UserProfile:
+    """
+    Update the current user's profile.
+    
+    - **first_name**: New first name (optional)
+    - **last_name**: New last name (optional)
+    - **bio**: New bio (optional)
+    
+    Requires authentication via Bearer token.
+    """
+    return await update_user_profile(db, principal.id, update_data)
+
+
 @router.get("/health")
 async def health_check():
     """
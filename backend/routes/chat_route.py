@@ -3,13 +3,20 @@ Group chat routes for study sessions.
 Provides endpoints for sending and retrieving messages within a session.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+import asyncio
+import time
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header, WebSocket
 
-from models import ChatMessageCreate, ChatMessageResponse
-from supabase_client import get_supabase_client
-from functions.chat_functions import send_message, get_session_messages, delete_message
-from functions.auth_functions import verify_token
+from models import ChatMessageCreate, ChatMessageResponse, Principal
+from storage import get_storage
+from functions.chat_functions import send_message, get_session_messages, get_messages_version, delete_message, is_session_participant
+from functions.realtime import chat_hub
+from functions.membership import membership_index
+from functions.etags import make_etag, etag_matches, not_modified, set_etag
+from functions.responses import json_list_response, message_list_adapter
+from dependencies import get_current_user, get_principal
+from config import settings
 
 # Create router for chat endpoints
 router = APIRouter(
@@ -24,56 +31,12 @@ router = APIRouter(
 )
 
 
-def get_current_user(authorization: str = Header(None)):
-    """
-    Dependency to extract and verify the current user from JWT token.
-    Expected header format: "Bearer <token>"
-    """
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing authorization header"
-        )
-    
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-        
-        payload = verify_token(token)
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        return user_id
-    
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token verification failed"
-        )
-
-
 @router.post("/{session_id}/messages", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_chat_message(
     session_id: str,
     message_data: ChatMessageCreate,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> ChatMessageResponse:
     """
     Send a message in a session group chat.
@@ -93,16 +56,19 @@ async def send_chat_message(
             detail="Session ID mismatch"
         )
     
-    return await send_message(db, user_id, message_data)
+    return await send_message(db, principal.id, message_data)
 
 
 @router.get("/{session_id}/messages", response_model=List[ChatMessageResponse])
 async def get_messages(
     session_id: str,
     limit: int = Query(50, ge=1, le=100, description="Number of messages to retrieve"),
-    offset: int = Query(0, ge=0, description="Number of messages to skip"),
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    offset: int = Query(0, ge=0, description="Number of messages to skip (ignored with a cursor)"),
+    after: Optional[str] = Query(None, description="Only return messages newer than this cursor (X-Next-Cursor)"),
+    before: Optional[str] = Query(None, description="Return the messages just older than this cursor (X-Prev-Cursor)"),
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> List[ChatMessageResponse]:
     """
     Get messages from a session group chat.
@@ -110,18 +76,41 @@ async def get_messages(
     - **session_id**: ID of the session
     - **limit**: Maximum number of messages (1-100, default 50)
     - **offset**: Number of messages to skip for pagination
+    - **after**: Poll for messages newer than this cursor
+    - **before**: Load older history before this cursor
     
-    Returns messages ordered by creation time (oldest first).
+    User must be a participant in the session.
+    Returns messages ordered by creation time (oldest first). The
+    **X-Next-Cursor** header is the cursor to poll with next (it is unchanged
+    when there are no new messages), and **X-Prev-Cursor** is the cursor for
+    loading older history.
+    Responses carry an **ETag**; polling with **If-None-Match** returns 304
+    while the chat has not changed.
     Requires authentication via Bearer token.
     """
-    return await get_session_messages(db, session_id, limit, offset)
+    etag = make_etag(
+        'messages', session_id, await get_messages_version(db, session_id, principal.id),
+        limit, offset, after, before
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    messages, before_cursor, after_cursor = await get_session_messages(db, session_id, principal.id, limit, offset, after, before)
+    response = json_list_response(message_list_adapter, messages)
+    if before_cursor:
+        response.headers['X-Prev-Cursor'] = before_cursor
+    if after_cursor:
+        response.headers['X-Next-Cursor'] = after_cursor
+    set_etag(response, etag)
+    
+    return response
 
 
 @router.delete("/messages/{message_id}", status_code=status.HTTP_200_OK)
 async def delete_chat_message(
     message_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ):
     """
     Delete a message from the group chat.
@@ -134,5 +123,75 @@ async def delete_chat_message(
     Returns:
         Message confirming successful deletion
     """
-    await delete_message(db, user_id, message_id)
+    await delete_message(db, principal.id, message_id)
     return {"message": "Message deleted successfully"}
+
+
+@router.websocket("/{session_id}/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    session_id: str,
+    token: str = Query(..., description="JWT access token (browsers cannot set headers on WebSockets)"),
+    db = Depends(get_storage)
+):
+    """
+    Real-time feed of new messages in a session group chat.
+    
+    - **session_id**: ID of the session
+    - **token**: Access token, passed as a query parameter
+    
+    Every message sent through POST /chat/{session_id}/messages is pushed to
+    all connected participants as a ChatMessageResponse JSON object.
+    Connections that cannot keep up are closed with code 1013; clients should
+    reconnect and catch up with the after cursor on the messages endpoint.
+    Connections of users who leave the session, or of a deleted session, are
+    closed with code 1008.
+    """
+    try:
+        principal = await get_principal(token, db)
+    except HTTPException:
+        principal = None
+    
+    if principal is None or not await is_session_participant(db, session_id, principal.id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    subscription = chat_hub.subscribe(session_id, owner=principal.id)
+    
+    async def forward_messages():
+        # Leaving or deleting on this worker revokes the subscription at once;
+        # the periodic check reads the participant row itself, not the cached
+        # member set, to catch those handled by other workers
+        next_check = time.monotonic() + settings.CHAT_WS_MEMBERSHIP_CHECK_SECONDS
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscription.next(), max(next_check - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                if not await db.participants.is_participant(session_id, principal.id):
+                    membership_index.remove(session_id, principal.id)
+                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                    return
+                next_check = time.monotonic() + settings.CHAT_WS_MEMBERSHIP_CHECK_SECONDS
+                continue
+            if payload is None:
+                code = status.WS_1008_POLICY_VIOLATION if subscription.revoked else status.WS_1013_TRY_AGAIN_LATER
+                await websocket.close(code=code)
+                return
+            await websocket.send_text(payload)
+    
+    async def wait_for_disconnect():
+        # Clients send messages over REST; anything received here is ignored
+        while True:
+            await websocket.receive_text()
+    
+    tasks = [asyncio.create_task(forward_messages()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # Disconnects surface as task exceptions; retrieve them so they are not logged
+            task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        chat_hub.unsubscribe(subscription)
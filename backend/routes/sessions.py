@@ -3,25 +3,43 @@ Study session management routes.
 Provides endpoints for creating, viewing, joining, and filtering study sessions.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, status, Depends, Query, Header, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from models import (
     StudySessionCreate,
+    BulkSessionCreate,
     StudySessionResponse,
-    SessionParticipant
+    SessionCalendarResponse,
+    SessionParticipant,
+    SessionFilterRequest,
+    MeetingType,
+    Principal
 )
-from supabase_client import get_supabase_client
+from storage import get_storage
 from functions.session_functions import (
     create_session,
+    create_sessions,
     get_session_by_id,
     get_user_sessions,
     get_school_sessions,
+    get_school_calendar,
     add_participant,
     remove_participant,
     get_session_participants,
-    delete_session
+    get_session_version,
+    get_school_sessions_version,
+    get_user_sessions_version,
+    delete_session,
+    check_session_creator,
+    purge_and_delete_session
 )
-from functions.auth_functions import verify_token
+from functions.realtime import session_event_hub
+from functions.etags import make_etag, make_content_etag, etag_matches, not_modified, set_etag
+from functions.responses import json_list_response, json_model_response, session_list_adapter, participant_list_adapter
+from dependencies import get_current_user, get_principal
+from config import settings
 
 # Create router for session endpoints
 router = APIRouter(
@@ -35,56 +53,11 @@ router = APIRouter(
 )
 
 
-def get_current_user(authorization: str = Header(None)):
-    """
-    Dependency to extract and verify the current user from JWT token in Authorization header.
-    
-    Expected header format: "Bearer <token>"
-    """
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing authorization header"
-        )
-    
-    try:
-        scheme, token = authorization.split()
-        if scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication scheme"
-            )
-        
-        payload = verify_token(token)
-        user_id = payload.get("sub")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        return user_id
-    
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token verification failed"
-        )
-
-
 @router.post("/", response_model=StudySessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_session(
     session_data: StudySessionCreate,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> StudySessionResponse:
     """
     Create a new study session.
@@ -97,86 +70,224 @@ async def create_new_session(
     - **location**: Physical location or "Online"
     - **meeting_type**: One of "on_campus", "off_campus", or "online"
     - **max_capacity**: Maximum number of participants
+    - **recurrence**: Optional `{"frequency": "weekly" | "biweekly", "until": "YYYY-MM-DD"}`;
+      every occurrence is created and the first one is returned
+    
+    Requires authentication via Bearer token.
+    """
+    return await create_session(db, principal.id, session_data)
+
+
+@router.post("/bulk", response_model=List[StudySessionResponse], status_code=status.HTTP_201_CREATED)
+async def create_sessions_bulk(
+    bulk_data: BulkSessionCreate,
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
+) -> List[StudySessionResponse]:
+    """
+    Create several study sessions at once.
+    
+    - **sessions**: List of sessions, in the same format as POST /sessions/
+    
+    Recurring entries are expanded into their occurrences. Returns every
+    created session in request order.
+    Requires authentication via Bearer token.
+    """
+    return await create_sessions(db, principal.id, bulk_data.sessions)
+
+
+@router.get("/events")
+async def stream_session_events(
+    token: str = Query(..., description="JWT access token (EventSource cannot set headers)"),
+    db = Depends(get_storage)
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of listing changes for the user's school.
+    
+    - **token**: Access token, passed as a query parameter
+    
+    Each event's data is a JSON object whose **type** is one of:
+    - **session_created**: includes the new session under **session**
+    - **session_deleted**: includes **session_id**
+    - **capacity_changed**: includes **session_id**, **current_capacity**, **max_capacity** and **is_full**
+    
+    Idle streams receive a comment line every few seconds as a keep-alive.
+    """
+    principal = await get_principal(token, db)
+    
+    async def event_stream():
+        subscription = session_event_hub.subscribe(principal.school)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.next(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    # Evicted for falling behind; the browser reconnects on its own
+                    return
+                yield f"data: {payload}\n\n"
+        finally:
+            session_event_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/calendar", response_model=SessionCalendarResponse)
+async def get_session_calendar(
+    date_from: str = Query(..., alias="from", description="First day of the window (YYYY-MM-DD)"),
+    date_to: str = Query(..., alias="to", description="Last day of the window (YYYY-MM-DD)"),
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
+) -> SessionCalendarResponse:
+    """
+    Get the sessions of the user's school between two dates, grouped by day.
     
+    - **from** / **to**: Inclusive window, at most MAX_CALENDAR_DAYS days (62 by default)
+    
+    Every day of the window is listed, with its sessions ordered by start
+    time. Supports **ETag** / **If-None-Match** like GET /sessions/.
     Requires authentication via Bearer token.
     """
-    return await create_session(db, user_id, session_data)
+    version = await get_school_sessions_version(db, principal.school)
+    etag = make_etag('calendar', principal.school, version, date_from, date_to)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    calendar = await get_school_calendar(db, principal.school, date_from, date_to, version)
+    response = json_model_response(calendar)
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/{session_id}", response_model=StudySessionResponse)
 async def get_session(
     session_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> StudySessionResponse:
     """
     Get details of a specific study session by ID.
     
     Includes current capacity, creator information, and status (full/available).
+    Responses carry an **ETag**; send it back as **If-None-Match** to get a
+    304 when the session has not changed.
     Requires authentication via Bearer token.
     """
-    return await get_session_by_id(db, session_id)
+    etag = make_etag('session', session_id, await get_session_version(db, session_id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    session = await get_session_by_id(db, session_id)
+    set_etag(response, etag)
+    return session
 
 
 @router.get("/my/sessions", response_model=List[StudySessionResponse])
 async def get_my_sessions(
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> List[StudySessionResponse]:
     """
     Get all study sessions for the current user.
     
     Returns both sessions created by the user and sessions they've joined.
+    Supports **ETag** / **If-None-Match** like GET /sessions/{session_id}.
     Requires authentication via Bearer token.
     """
-    return await get_user_sessions(db, user_id)
+    etag = make_etag('my-sessions', principal.id, await get_user_sessions_version(db, principal.id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    sessions = await get_user_sessions(db, principal.id)
+    response = json_list_response(session_list_adapter, sessions)
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/", response_model=List[StudySessionResponse])
 async def get_available_sessions(
-    user_id: str = Depends(get_current_user),
+    principal: Principal = Depends(get_current_user),
     course_code: str = Query(None, description="Filter by course code"),
-    meeting_type: str = Query(None, description="Filter by meeting type: in_person, online, or hybrid"),
+    meeting_type: MeetingType = Query(None, description="Filter by meeting type: on_campus, off_campus, or online"),
+    date_from: str = Query(None, description="Only sessions on or after this date (YYYY-MM-DD)"),
+    date_to: str = Query(None, description="Only sessions on or before this date (YYYY-MM-DD)"),
     exclude_full: bool = Query(False, description="Exclude sessions that are full"),
-    db = Depends(get_supabase_client)
+    q: Optional[str] = Query(None, max_length=200, description="Search title, description and course code; results are ordered by relevance"),
+    limit: int = Query(50, ge=1, le=100, description="Number of sessions per page"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    if_none_match: Optional[str] = Header(None),
+    db = Depends(get_storage)
 ) -> List[StudySessionResponse]:
     """
-    Get all available study sessions for the user's school.
+    Get available study sessions for the user's school, one page at a time.
     
     Supports filtering by:
     - **course_code**: Show only sessions for a specific course
-    - **meeting_type**: Show only in_person, online, or hybrid sessions
+    - **meeting_type**: Show only on_campus, off_campus, or online sessions
+    - **date_from** / **date_to**: Show only sessions within a date range
     - **exclude_full**: Hide sessions that have reached max capacity
+    - **q**: Full-text search; matching sessions are returned most relevant first
+    
+    Sessions are ordered by date and time, or by relevance when **q** is
+    given. When more sessions are available, the response carries an
+    **X-Next-Cursor** header; pass it back as **after** to fetch the next page.
+    
+    Supports **ETag** / **If-None-Match**: the tag covers the whole school's
+    listing and the query parameters, so an unchanged poll gets a 304. Search
+    results (**q**) are tagged by their content instead.
     
     Requires authentication via Bearer token.
     """
-    # Get user's school from database
-    user_response = db.table('users').select('school').eq('id', user_id).execute()
-    if not user_response.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+    filters = SessionFilterRequest(
+        course_code=course_code,
+        meeting_type=meeting_type,
+        date_from=date_from,
+        date_to=date_to,
+        search_term=q.strip() if q and q.strip() else None,
+        exclude_full=exclude_full
+    )
+    
+    version = await get_school_sessions_version(db, principal.school)
+    if not filters.search_term:
+        etag = make_etag(
+            'sessions', principal.school, version,
+            course_code, meeting_type, date_from, date_to, exclude_full, limit, after
         )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
     
-    school = user_response.data[0]['school']
+    sessions, next_cursor = await get_school_sessions(db, principal.school, filters, limit, after, version)
+    response = json_list_response(session_list_adapter, sessions)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
     
-    # Build filters dict
-    filters = {}
-    if course_code:
-        filters['course_code'] = course_code
-    if meeting_type:
-        filters['meeting_type'] = meeting_type
-    if exclude_full:
-        filters['exclude_full'] = True
+    if filters.search_term:
+        # The in-process search index can lag writes made on other workers,
+        # so the version alone does not pin down what was ranked
+        etag = make_content_etag(response.body, next_cursor)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    set_etag(response, etag)
     
-    return await get_school_sessions(db, school, filters if filters else None)
+    return response
 
 
 @router.post("/{session_id}/join", status_code=status.HTTP_200_OK)
 async def join_session(
     session_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ):
     """
     Join an existing study session.
@@ -187,17 +298,17 @@ async def join_session(
     Requires authentication via Bearer token.
     
     Returns:
-        Message confirming successful join
+        Message confirming successful join, with **status** "joined"
     """
-    await add_participant(db, session_id, user_id)
-    return {"message": "Successfully joined the session"}
+    result = await add_participant(db, session_id, principal.id)
+    return {"message": "Successfully joined the session", "status": result.value}
 
 
 @router.post("/{session_id}/leave", status_code=status.HTTP_200_OK)
 async def leave_session(
     session_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ):
     """
     Leave a study session that you've joined.
@@ -208,37 +319,61 @@ async def leave_session(
     Requires authentication via Bearer token.
     
     Returns:
-        Message confirming successful departure
+        Message confirming successful departure, with **status** "left"
+        (or "not_member" if the user was not in the session)
     """
-    await remove_participant(db, session_id, user_id)
-    return {"message": "Successfully left the session"}
+    result = await remove_participant(db, session_id, principal.id)
+    return {"message": "Successfully left the session", "status": result.value}
 
 
 @router.get("/{session_id}/participants", response_model=List[SessionParticipant])
 async def get_participants(
     session_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Number of participants per page (default: all)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ) -> List[SessionParticipant]:
     """
-    Get all participants in a study session.
+    Get the participants in a study session.
     
     - **session_id**: ID of the session
+    - **limit**: Optional page size for very large sessions
+    - **after**: Cursor for the next page
     
-    Returns a list of all users participating in the session.
+    Returns users in the order they joined. When **limit** is set and more
+    participants are available, the response carries an **X-Next-Cursor** header.
     Requires authentication via Bearer token.
     """
-    return await get_session_participants(db, session_id)
+    participants, next_cursor = await get_session_participants(db, session_id, limit, after)
+    response = json_list_response(participant_list_adapter, participants)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    
+    return response
 
 
 @router.delete("/{session_id}")
 async def delete_session_endpoint(
     session_id: str,
-    user_id: str = Depends(get_current_user),
-    db = Depends(get_supabase_client)
+    response: Response,
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Purge the chat history in the background and return immediately"),
+    principal: Principal = Depends(get_current_user),
+    db = Depends(get_storage)
 ):
     """
     Delete a session you created. Only the creator may delete.
+    
+    Participants and chat messages are deleted along with the session.
+    For sessions with a very large chat history, pass background=true to
+    get a 202 right away while the messages are purged in batches.
     """
-    await delete_session(db, session_id, user_id)
+    if background:
+        await check_session_creator(db, session_id, principal.id)
+        background_tasks.add_task(purge_and_delete_session, db, session_id, principal.id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": "Session deletion scheduled"}
+    
+    await delete_session(db, session_id, principal.id)
     return {"message": "Session deleted"}
\ No newline at end of file
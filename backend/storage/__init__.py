@@ -0,0 +1,83 @@
+"""
+Storage backends for users, sessions, participants and messages.
+
+STORAGE_BACKEND selects the implementation:
+- "supabase": the hosted Postgres database through PostgREST (default)
+- "sqlite": a local SQLite file or in-memory database, for offline
+  development, benchmarks and load tests
+
+Only the selected backend's dependencies are imported.
+"""
+
+import asyncio
+from typing import Optional
+
+from config import settings
+from storage.base import Storage
+
+# Shared storage backend, created on startup (or on first use)
+storage: Optional[Storage] = None
+_storage_lock = asyncio.Lock()
+
+
+async def init_storage() -> Optional[Storage]:
+    """
+    Create the configured storage backend if it does not exist yet.
+
+    Returns:
+        Storage instance, or None if the Supabase backend has no credentials
+    """
+    global storage
+    if storage is None:
+        async with _storage_lock:
+            if storage is None:
+                if settings.STORAGE_BACKEND == 'sqlite':
+                    from storage.sqlite_storage import SQLiteStorage
+                    storage = SQLiteStorage(settings.SQLITE_PATH)
+                elif settings.STORAGE_BACKEND == 'supabase':
+                    from supabase_client import init_supabase_client
+                    from storage.supabase_storage import SupabaseStorage
+                    client = await init_supabase_client()
+                    if client is not None:
+                        storage = SupabaseStorage(client)
+                else:
+                    raise RuntimeError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+                if storage is not None and settings.METRICS_ENABLED:
+                    from storage.instrumented import InstrumentedStorage
+                    storage = InstrumentedStorage(storage)
+    return storage
+
+
+def set_storage(backend: Optional[Storage]) -> None:
+    """
+    Replace the shared storage backend (e.g. with a seeded one in benchmarks).
+    """
+    global storage
+    storage = backend
+
+
+async def close_storage() -> None:
+    """
+    Close the shared storage backend on shutdown.
+    """
+    global storage
+    if storage is not None:
+        await storage.close()
+        storage = None
+
+
+async def get_storage() -> Storage:
+    """
+    Dependency function to provide the storage backend to routes.
+
+    Returns:
+        Storage: The configured storage backend
+    """
+    backend = await init_storage()
+    if backend is None:
+        raise RuntimeError(
+            "Storage not initialized. "
+            "Please set SUPABASE_URL and SUPABASE_KEY in your .env file, "
+            "or set STORAGE_BACKEND=sqlite"
+        )
+    return backend
@@ -0,0 +1,229 @@
+"""
+Repository interfaces for the storage backends.
+
+Business logic in functions/*.py talks to these interfaces instead of a
+concrete database client. Each method is one round trip to the database and
+returns plain dicts shaped like the Supabase rows the API already used:
+session rows embed their creator under 'creator', participant rows embed
+the user under 'user'. Cursors are decoded by the caller and passed in as
+the list of sort key values.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import SessionFilterRequest
+
+
+class UserRepository(ABC):
+    """users table"""
+
+    @abstractmethod
+    async def email_exists(self, email: str) -> bool:
+        """Whether a user with this email is registered"""
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        """Full users row, including password_hash, or None"""
+
+    @abstractmethod
+    async def create(self, user_data: dict) -> dict:
+        """Insert a user and return the full row"""
+
+    @abstractmethod
+    async def get_profile(self, user_id: str) -> Optional[dict]:
+        """id, email, first_name, last_name and school of a user, or None"""
+
+    @abstractmethod
+    async def get_profiles(self, user_ids: List[str]) -> List[dict]:
+        """Profiles of several users in one query"""
+
+    @abstractmethod
+    async def update(self, user_id: str, changes: dict) -> Optional[dict]:
+        """Apply changes and return the full row, or None if the user does not exist"""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[dict]:
+        """Full users row, or None"""
+
+
+class SessionRepository(ABC):
+    """study_sessions table"""
+
+    @abstractmethod
+    async def create_many(self, rows: List[dict]) -> List[dict]:
+        """Insert sessions in one batch and return the inserted rows, in order"""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[dict]:
+        """Listing row of one session, or None"""
+
+    @abstractmethod
+    async def get_many(self, session_ids: List[str]) -> List[dict]:
+        """Listing rows of several sessions, in no particular order"""
+
+    @abstractmethod
+    async def list_by_creator(self, user_id: str) -> List[dict]:
+        """Listing rows of the sessions a user created"""
+
+    @abstractmethod
+    async def list_school(
+        self,
+        school: str,
+        filters: Optional[SessionFilterRequest],
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[dict]:
+        """One page of a school's listing, by (date, time, id) keyset"""
+
+    @abstractmethod
+    async def list_school_window(self, school: str, starts_from: str, starts_before: str) -> List[dict]:
+        """A school's sessions with starts_from <= starts_at < starts_before, by (starts_at, id)"""
+
+    @abstractmethod
+    async def list_search_rows(self, school: str) -> List[dict]:
+        """Every session of a school with the columns the in-process search index needs"""
+
+    @abstractmethod
+    async def search(
+        self,
+        school: str,
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[Tuple[float, str]]:
+        """
+        One page of (rank, id) for filters.search_term, best first, after the
+        (rank, id) of the previous page. Backends without full-text search
+        rank with the in-process search index.
+        """
+
+    @abstractmethod
+    async def get_creator_id(self, session_id: str) -> Optional[str]:
+        """creator_id of a session, or None if it does not exist"""
+
+    @abstractmethod
+    async def exists(self, session_id: str) -> bool:
+        """Whether the session exists"""
+
+    @abstractmethod
+    async def delete(self, session_id: str, user_id: str) -> dict:
+        """
+        Atomically delete a session created by user_id, with its participants
+        and messages. Returns {'status': deleted|forbidden|not_found, 'school'}.
+        """
+
+    @abstractmethod
+    async def version(self, session_id: str) -> Optional[str]:
+        """Version token of one session, or None if it does not exist"""
+
+    @abstractmethod
+    async def school_version(self, school: str) -> str:
+        """Version token of a school's listing"""
+
+    @abstractmethod
+    async def user_version(self, user_id: str) -> str:
+        """Version token of the sessions a user created or joined"""
+
+
+class ParticipantRepository(ABC):
+    """session_participants table"""
+
+    @abstractmethod
+    async def add_many(self, rows: List[dict]) -> None:
+        """Insert participant rows in one batch (used for new sessions' creators)"""
+
+    @abstractmethod
+    async def join(self, session_id: str, user_id: str) -> dict:
+        """
+        Atomically join a session. Returns {'status': joined|already_member|full|not_found,
+        'current_capacity', 'max_capacity', 'school'}.
+        """
+
+    @abstractmethod
+    async def leave(self, session_id: str, user_id: str) -> dict:
+        """
+        Atomically leave a session. Returns {'status': left|not_member|creator|not_found,
+        'current_capacity', 'max_capacity', 'school'}.
+        """
+
+    @abstractmethod
+    async def session_ids_for_user(self, user_id: str) -> List[str]:
+        """IDs of the sessions a user joined"""
+
+    @abstractmethod
+    async def user_ids_for_session(self, session_id: str) -> List[str]:
+        """IDs of a session's participants"""
+
+    @abstractmethod
+    async def is_participant(self, session_id: str, user_id: str) -> bool:
+        """Whether the user has joined the session"""
+
+    @abstractmethod
+    async def list(self, session_id: str, limit: Optional[int], after: Optional[List[Any]]) -> List[dict]:
+        """Participants with their user embedded, by (joined_at, user_id) keyset"""
+
+
+class MessageRepository(ABC):
+    """session_messages table"""
+
+    @abstractmethod
+    async def create(self, message: dict) -> dict:
+        """Insert a message and return the row"""
+
+    @abstractmethod
+    async def list(
+        self,
+        session_id: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[List[Any]] = None,
+        before: Optional[List[Any]] = None
+    ) -> List[dict]:
+        """
+        Messages of a session, oldest first: newer than after, the page just
+        older than before, or starting at offset without a cursor.
+        """
+
+    @abstractmethod
+    async def get_author_id(self, message_id: str) -> Optional[str]:
+        """user_id of a message, or None if it does not exist"""
+
+    @abstractmethod
+    async def delete(self, message_id: str) -> None:
+        """Delete one message"""
+
+    @abstractmethod
+    async def purge(self, session_id: str, batch_size: int) -> int:
+        """Delete up to batch_size messages of a session and return how many were deleted"""
+
+    @abstractmethod
+    async def version(self, session_id: str) -> str:
+        """Version token of a session's chat"""
+
+
+class Storage:
+    """
+    One storage backend: a repository per table.
+    """
+
+    name = 'base'
+
+    def __init__(
+        self,
+        users: UserRepository,
+        sessions: SessionRepository,
+        participants: ParticipantRepository,
+        messages: MessageRepository
+    ):
+        self.users = users
+        self.sessions = sessions
+        self.participants = participants
+        self.messages = messages
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend details for /health"""
+        return {'backend': self.name}
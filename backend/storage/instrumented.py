@@ -0,0 +1,118 @@
+"""
+Storage wrapper that measures database use per request.
+Every repository call is one round trip, so counting calls counts queries.
+The counts go to the RequestStats of the request being served, which the
+metrics middleware exports and the load test reports.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from storage.base import Storage
+
+
+class RequestStats:
+    """Database use of one request"""
+
+    __slots__ = ('queries', 'db_seconds', 'rows')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar('request_stats', default=None)
+
+
+@contextlib.contextmanager
+def track_request() -> Iterator[RequestStats]:
+    """
+    Measure the storage calls made inside the block.
+
+    If the caller is already measuring (e.g. the load test driving the app
+    in-process), its RequestStats is reused so both see the same numbers.
+
+    Yields:
+        RequestStats that storage calls of this request are added to
+    """
+    stats = _request_stats.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """
+    RequestStats of the request being served, or None outside a request.
+    """
+    return _request_stats.get()
+
+
+def _row_count(result: Any) -> int:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return 0
+
+
+class _InstrumentedRepository:
+    """Proxies a repository, timing each call and counting the rows it returns"""
+
+    def __init__(self, repository):
+        self._repository = repository
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._repository, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        async def measured(*args, **kwargs):
+            stats = _request_stats.get()
+            if stats is None:
+                return await attribute(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = await attribute(*args, **kwargs)
+            finally:
+                stats.queries += 1
+                stats.db_seconds += time.perf_counter() - start
+            stats.rows += _row_count(result)
+            return result
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, measured)
+        return measured
+
+
+class InstrumentedStorage(Storage):
+    """
+    Storage that adds every call of the wrapped backend to the current
+    request's RequestStats.
+    """
+
+    def __init__(self, inner: Storage):
+        self.inner = inner
+        self.name = inner.name
+        super().__init__(
+            users=_InstrumentedRepository(inner.users),
+            sessions=_InstrumentedRepository(inner.sessions),
+            participants=_InstrumentedRepository(inner.participants),
+            messages=_InstrumentedRepository(inner.messages)
+        )
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.inner.stats()
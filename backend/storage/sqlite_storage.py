@@ -0,0 +1,676 @@
+"""
+SQLite storage backend.
+A local database file, or ':memory:', with the same tables, triggers and
+indexes as the Supabase schema in SUPABASE_SETUP.md. Used for offline
+development, benchmarks and load tests, and for comparing query plans
+with EXPLAIN QUERY PLAN.
+
+SQLite runs in-process and these statements take microseconds, so they run
+directly on the event loop instead of in a thread pool. Every method
+therefore runs to completion before another request can touch the database,
+which makes join, leave and delete atomic just like the database functions
+they stand in for.
+"""
+
+import sqlite3
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from models import SessionFilterRequest
+from functions.search_index import search_index
+from storage.base import (
+    Storage,
+    UserRepository,
+    SessionRepository,
+    ParticipantRepository,
+    MessageRepository
+)
+
+
+NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now'))"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    bio TEXT,
+    rating REAL,
+    created_at TEXT NOT NULL DEFAULT {NOW},
+    updated_at TEXT NOT NULL DEFAULT {NOW}
+);
+
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    course_code TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    location TEXT NOT NULL,
+    meeting_type TEXT NOT NULL,
+    max_capacity INTEGER NOT NULL,
+    current_capacity INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1,
+    creator_id TEXT NOT NULL REFERENCES users(id),
+    school TEXT NOT NULL,
+    starts_at TEXT GENERATED ALWAYS AS (date || 'T' || time) STORED,
+    created_at TEXT NOT NULL DEFAULT {NOW},
+    updated_at TEXT NOT NULL DEFAULT {NOW}
+);
+
+CREATE TABLE IF NOT EXISTS session_participants (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES study_sessions(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    joined_at TEXT NOT NULL DEFAULT {NOW},
+    UNIQUE(session_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS school_versions (
+    school TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_session_versions (
+    user_id TEXT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS chat_versions (
+    session_id TEXT PRIMARY KEY REFERENCES study_sessions(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS session_messages (
+    -- AUTOINCREMENT so seq is never reused, even after the newest message is deleted
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    session_id TEXT NOT NULL REFERENCES study_sessions(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT {NOW},
+    edited_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_school ON users(school);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_creator ON study_sessions(creator_id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_school_date_time_id ON study_sessions(school, date, time, id);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_school_starts_at ON study_sessions(school, starts_at, id);
+CREATE INDEX IF NOT EXISTS idx_session_participants_user ON session_participants(user_id);
+CREATE INDEX IF NOT EXISTS idx_session_participants_session_joined ON session_participants(session_id, joined_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_session_messages_session_seq ON session_messages(session_id, seq);
+CREATE INDEX IF NOT EXISTS idx_session_messages_user ON session_messages(user_id);
+
+-- current_capacity and version follow the participant rows, like the
+-- Postgres trigger
+CREATE TRIGGER IF NOT EXISTS trg_session_participants_insert
+AFTER INSERT ON session_participants
+BEGIN
+    UPDATE study_sessions
+    SET current_capacity = current_capacity + 1, version = version + 1
+    WHERE id = NEW.session_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_session_participants_delete
+AFTER DELETE ON session_participants
+BEGIN
+    UPDATE study_sessions
+    SET current_capacity = current_capacity - 1, version = version + 1
+    WHERE id = OLD.session_id;
+END;
+
+-- Per-school and per-user version counters, bumped like the Postgres
+-- VERSION COUNTERS triggers
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_insert_versions
+AFTER INSERT ON study_sessions
+BEGIN
+    INSERT INTO school_versions (school, version) VALUES (NEW.school, 1)
+    ON CONFLICT (school) DO UPDATE SET version = version + 1;
+    INSERT INTO user_session_versions (user_id, version) VALUES (NEW.creator_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_update_versions
+AFTER UPDATE ON study_sessions
+BEGIN
+    INSERT INTO school_versions (school, version)
+    SELECT OLD.school, 1 WHERE OLD.school IS NOT NEW.school
+    ON CONFLICT (school) DO UPDATE SET version = version + 1;
+    INSERT INTO school_versions (school, version) VALUES (NEW.school, 1)
+    ON CONFLICT (school) DO UPDATE SET version = version + 1;
+    INSERT INTO user_session_versions (user_id, version)
+    SELECT NEW.creator_id, 1
+    UNION
+    SELECT user_id, 1 FROM session_participants WHERE session_id = NEW.id
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_study_sessions_delete_versions
+AFTER DELETE ON study_sessions
+BEGIN
+    INSERT INTO school_versions (school, version) VALUES (OLD.school, 1)
+    ON CONFLICT (school) DO UPDATE SET version = version + 1;
+    INSERT INTO user_session_versions (user_id, version) VALUES (OLD.creator_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_session_participants_insert_versions
+AFTER INSERT ON session_participants
+BEGIN
+    INSERT INTO user_session_versions (user_id, version) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_session_participants_delete_versions
+AFTER DELETE ON session_participants
+BEGIN
+    INSERT INTO user_session_versions (user_id, version) VALUES (OLD.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_versions
+AFTER UPDATE OF first_name, last_name ON users
+WHEN OLD.first_name IS NOT NEW.first_name OR OLD.last_name IS NOT NEW.last_name
+BEGIN
+    INSERT INTO school_versions (school, version)
+    SELECT DISTINCT school, 1 FROM study_sessions WHERE creator_id = NEW.id
+    ON CONFLICT (school) DO UPDATE SET version = version + 1;
+    INSERT INTO user_session_versions (user_id, version)
+    SELECT NEW.id, 1
+    UNION
+    SELECT p.user_id, 1
+    FROM session_participants p
+    JOIN study_sessions s ON s.id = p.session_id
+    WHERE s.creator_id = NEW.id
+    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    INSERT INTO chat_versions (session_id, version)
+    SELECT DISTINCT session_id, 1 FROM session_messages WHERE user_id = NEW.id
+    ON CONFLICT (session_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_session_messages_insert_versions
+AFTER INSERT ON session_messages
+BEGIN
+    INSERT INTO chat_versions (session_id, version) VALUES (NEW.session_id, 1)
+    ON CONFLICT (session_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_session_messages_update_versions
+AFTER UPDATE ON session_messages
+BEGIN
+    INSERT INTO chat_versions (session_id, version) VALUES (NEW.session_id, 1)
+    ON CONFLICT (session_id) DO UPDATE SET version = version + 1;
+END;
+
+-- Messages removed along with their session are skipped, since its
+-- counter goes with it
+CREATE TRIGGER IF NOT EXISTS trg_session_messages_delete_versions
+AFTER DELETE ON session_messages
+BEGIN
+    INSERT INTO chat_versions (session_id, version)
+    SELECT OLD.session_id, 1 WHERE EXISTS (SELECT 1 FROM study_sessions WHERE id = OLD.session_id)
+    ON CONFLICT (session_id) DO UPDATE SET version = version + 1;
+END;
+"""
+
+USER_COLUMNS = ('email', 'password_hash', 'first_name', 'last_name', 'school', 'bio', 'rating', 'created_at', 'updated_at')
+
+SESSION_COLUMNS = (
+    'title', 'course_code', 'description', 'date', 'time', 'location', 'meeting_type',
+    'max_capacity', 'creator_id', 'school', 'created_at', 'updated_at'
+)
+
+USER_PROFILE_SELECT = 'SELECT id, email, first_name, last_name, school FROM users'
+
+# Columns of every session listing, with the creator joined in like the
+# Supabase embedded resource
+SESSION_LISTING_SELECT = """
+SELECT s.id, s.title, s.course_code, s.description, s.date, s.time, s.location, s.meeting_type,
+       s.max_capacity, s.current_capacity, s.creator_id, s.created_at, s.updated_at,
+       u.first_name AS creator_first_name, u.last_name AS creator_last_name, u.school AS creator_school
+FROM study_sessions s
+JOIN users u ON u.id = s.creator_id
+"""
+
+SEARCH_ROWS_SQL = """
+SELECT id, title, description, course_code, meeting_type, date, current_capacity, max_capacity
+FROM study_sessions
+WHERE school = ?
+"""
+
+SCHOOL_WINDOW_SQL = SESSION_LISTING_SELECT + """
+WHERE s.school = ? AND s.starts_at >= ? AND s.starts_at < ?
+ORDER BY s.starts_at, s.id
+"""
+
+PARTICIPANT_LIST_SELECT = """
+SELECT p.user_id, p.joined_at, u.id AS user_pk, u.first_name, u.last_name, u.email
+FROM session_participants p
+JOIN users u ON u.id = p.user_id
+WHERE p.session_id = ?
+"""
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+def _placeholders(count: int) -> str:
+    return ', '.join('?' * count)
+
+
+def _listing_row(row: sqlite3.Row) -> dict:
+    session = dict(row)
+    session['creator'] = {
+        'first_name': session.pop('creator_first_name'),
+        'last_name': session.pop('creator_last_name'),
+        'school': session.pop('creator_school')
+    }
+    return session
+
+
+class _SQLiteRepository:
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def _one(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        return self.connection.execute(sql, params).fetchone()
+
+    def _all(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return self.connection.execute(sql, params).fetchall()
+
+
+class SQLiteUserRepository(_SQLiteRepository, UserRepository):
+
+    async def email_exists(self, email: str) -> bool:
+        return self._one('SELECT 1 FROM users WHERE email = ?', (email,)) is not None
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        row = self._one('SELECT * FROM users WHERE email = ?', (email,))
+        return dict(row) if row else None
+
+    async def create(self, user_data: dict) -> dict:
+        user_id = _new_id()
+        columns = [column for column in USER_COLUMNS if column in user_data]
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO users (id, {', '.join(columns)}) VALUES (?, {_placeholders(len(columns))})",
+                [user_id, *(user_data[column] for column in columns)]
+            )
+        return await self.get(user_id)
+
+    async def get_profile(self, user_id: str) -> Optional[dict]:
+        row = self._one(f'{USER_PROFILE_SELECT} WHERE id = ?', (user_id,))
+        return dict(row) if row else None
+
+    async def get_profiles(self, user_ids: List[str]) -> List[dict]:
+        if not user_ids:
+            return []
+        rows = self._all(f'{USER_PROFILE_SELECT} WHERE id IN ({_placeholders(len(user_ids))})', user_ids)
+        return [dict(row) for row in rows]
+
+    async def update(self, user_id: str, changes: dict) -> Optional[dict]:
+        columns = [column for column in USER_COLUMNS if column in changes]
+        if columns:
+            with self.connection:
+                self.connection.execute(
+                    f"UPDATE users SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                    [*(changes[column] for column in columns), user_id]
+                )
+        return await self.get(user_id)
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        row = self._one('SELECT * FROM users WHERE id = ?', (user_id,))
+        return dict(row) if row else None
+
+
+class SQLiteSessionRepository(_SQLiteRepository, SessionRepository):
+
+    async def create_many(self, rows: List[dict]) -> List[dict]:
+        inserted = [
+            {**row, 'id': _new_id(), 'current_capacity': 0, 'version': 1}
+            for row in rows
+        ]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO study_sessions (id, {', '.join(SESSION_COLUMNS)}) "
+                f"VALUES (?, {_placeholders(len(SESSION_COLUMNS))})",
+                [[row['id'], *(row[column] for column in SESSION_COLUMNS)] for row in inserted]
+            )
+        return inserted
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        row = self._one(f'{SESSION_LISTING_SELECT} WHERE s.id = ?', (session_id,))
+        return _listing_row(row) if row else None
+
+    async def get_many(self, session_ids: List[str]) -> List[dict]:
+        if not session_ids:
+            return []
+        rows = self._all(
+            f'{SESSION_LISTING_SELECT} WHERE s.id IN ({_placeholders(len(session_ids))})',
+            session_ids
+        )
+        return [_listing_row(row) for row in rows]
+
+    async def list_by_creator(self, user_id: str) -> List[dict]:
+        rows = self._all(f'{SESSION_LISTING_SELECT} WHERE s.creator_id = ?', (user_id,))
+        return [_listing_row(row) for row in rows]
+
+    async def list_school(
+        self,
+        school: str,
+        filters: Optional[SessionFilterRequest],
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[dict]:
+        conditions = ['s.school = ?']
+        params: List[Any] = [school]
+
+        if filters:
+            if filters.course_code:
+                conditions.append('s.course_code = ?')
+                params.append(filters.course_code)
+            if filters.meeting_type:
+                conditions.append('s.meeting_type = ?')
+                params.append(filters.meeting_type.value)
+            if filters.date_from:
+                conditions.append('s.date >= ?')
+                params.append(filters.date_from)
+            if filters.date_to:
+                conditions.append('s.date <= ?')
+                params.append(filters.date_to)
+            if filters.exclude_full:
+                conditions.append('s.current_capacity < s.max_capacity')
+
+        if after:
+            conditions.append('(s.date, s.time, s.id) > (?, ?, ?)')
+            params.extend(after)
+
+        rows = self._all(
+            f"{SESSION_LISTING_SELECT} WHERE {' AND '.join(conditions)} "
+            'ORDER BY s.date, s.time, s.id LIMIT ?',
+            [*params, limit]
+        )
+        return [_listing_row(row) for row in rows]
+
+    async def list_school_window(self, school: str, starts_from: str, starts_before: str) -> List[dict]:
+        rows = self._all(SCHOOL_WINDOW_SQL, (school, starts_from, starts_before))
+        return [_listing_row(row) for row in rows]
+
+    async def list_search_rows(self, school: str) -> List[dict]:
+        return [dict(row) for row in self._all(SEARCH_ROWS_SQL, (school,))]
+
+    async def search(
+        self,
+        school: str,
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[Tuple[float, str]]:
+        # No tsvector here: rank with the in-process index instead
+        return await search_index.search_school(self, school, filters, limit, after)
+
+    async def get_creator_id(self, session_id: str) -> Optional[str]:
+        row = self._one('SELECT creator_id FROM study_sessions WHERE id = ?', (session_id,))
+        return row['creator_id'] if row else None
+
+    async def exists(self, session_id: str) -> bool:
+        return self._one('SELECT 1 FROM study_sessions WHERE id = ?', (session_id,)) is not None
+
+    async def delete(self, session_id: str, user_id: str) -> dict:
+        with self.connection:
+            row = self._one('SELECT creator_id, school FROM study_sessions WHERE id = ?', (session_id,))
+            if row is None:
+                return {'status': 'not_found'}
+            if row['creator_id'] != user_id:
+                return {'status': 'forbidden', 'school': row['school']}
+            # Participants and messages go with the ON DELETE CASCADE keys
+            self.connection.execute('DELETE FROM study_sessions WHERE id = ?', (session_id,))
+        return {'status': 'deleted', 'school': row['school']}
+
+    async def version(self, session_id: str) -> Optional[str]:
+        row = self._one(
+            'SELECT s.version, u.updated_at FROM study_sessions s '
+            'JOIN users u ON u.id = s.creator_id WHERE s.id = ?',
+            (session_id,)
+        )
+        return f"{row['version']}:{row['updated_at']}" if row else None
+
+    async def school_version(self, school: str) -> str:
+        row = self._one('SELECT version FROM school_versions WHERE school = ?', (school,))
+        return str(row['version'] if row else 0)
+
+    async def user_version(self, user_id: str) -> str:
+        row = self._one('SELECT version FROM user_session_versions WHERE user_id = ?', (user_id,))
+        return str(row['version'] if row else 0)
+
+
+class SQLiteParticipantRepository(_SQLiteRepository, ParticipantRepository):
+
+    async def add_many(self, rows: List[dict]) -> None:
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO session_participants (id, session_id, user_id) VALUES (?, ?, ?)',
+                [(_new_id(), row['session_id'], row['user_id']) for row in rows]
+            )
+
+    def _session_for_update(self, session_id: str) -> Optional[sqlite3.Row]:
+        return self._one(
+            'SELECT creator_id, current_capacity, max_capacity, school FROM study_sessions WHERE id = ?',
+            (session_id,)
+        )
+
+    async def join(self, session_id: str, user_id: str) -> dict:
+        with self.connection:
+            session = self._session_for_update(session_id)
+            if session is None:
+                return {'status': 'not_found'}
+
+            current_capacity = session['current_capacity']
+            if self._one(
+                'SELECT 1 FROM session_participants WHERE session_id = ? AND user_id = ?',
+                (session_id, user_id)
+            ):
+                outcome = 'already_member'
+            elif current_capacity >= session['max_capacity']:
+                outcome = 'full'
+            else:
+                self.connection.execute(
+                    'INSERT INTO session_participants (id, session_id, user_id) VALUES (?, ?, ?)',
+                    (_new_id(), session_id, user_id)
+                )
+                current_capacity += 1
+                outcome = 'joined'
+
+        return {
+            'status': outcome,
+            'current_capacity': current_capacity,
+            'max_capacity': session['max_capacity'],
+            'school': session['school']
+        }
+
+    async def leave(self, session_id: str, user_id: str) -> dict:
+        with self.connection:
+            session = self._session_for_update(session_id)
+            if session is None:
+                return {'status': 'not_found'}
+
+            current_capacity = session['current_capacity']
+            if session['creator_id'] == user_id:
+                outcome = 'creator'
+            elif self.connection.execute(
+                'DELETE FROM session_participants WHERE session_id = ? AND user_id = ?',
+                (session_id, user_id)
+            ).rowcount:
+                current_capacity -= 1
+                outcome = 'left'
+            else:
+                outcome = 'not_member'
+
+        return {
+            'status': outcome,
+            'current_capacity': current_capacity,
+            'max_capacity': session['max_capacity'],
+            'school': session['school']
+        }
+
+    async def session_ids_for_user(self, user_id: str) -> List[str]:
+        rows = self._all('SELECT session_id FROM session_participants WHERE user_id = ?', (user_id,))
+        return [row['session_id'] for row in rows]
+
+    async def user_ids_for_session(self, session_id: str) -> List[str]:
+        rows = self._all('SELECT user_id FROM session_participants WHERE session_id = ?', (session_id,))
+        return [row['user_id'] for row in rows]
+
+    async def is_participant(self, session_id: str, user_id: str) -> bool:
+        row = self._one(
+            'SELECT 1 FROM session_participants WHERE session_id = ? AND user_id = ?',
+            (session_id, user_id)
+        )
+        return row is not None
+
+    async def list(self, session_id: str, limit: Optional[int], after: Optional[List[Any]]) -> List[dict]:
+        sql = PARTICIPANT_LIST_SELECT
+        params: List[Any] = [session_id]
+
+        if after:
+            sql += ' AND (p.joined_at, p.user_id) > (?, ?)'
+            params.extend(after)
+
+        sql += ' ORDER BY p.joined_at, p.user_id'
+
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        return [
+            {
+                'user_id': row['user_id'],
+                'joined_at': row['joined_at'],
+                'user': {
+                    'id': row['user_pk'],
+                    'first_name': row['first_name'],
+                    'last_name': row['last_name'],
+                    'email': row['email']
+                }
+            }
+            for row in self._all(sql, params)
+        ]
+
+
+class SQLiteMessageRepository(_SQLiteRepository, MessageRepository):
+
+    async def create(self, message: dict) -> dict:
+        # seq and created_at come from the database, like the Postgres defaults
+        with self.connection:
+            seq = self.connection.execute(
+                'INSERT INTO session_messages (id, session_id, user_id, message) VALUES (?, ?, ?, ?)',
+                (_new_id(), message['session_id'], message['user_id'], message['message'])
+            ).lastrowid
+        return dict(self._one('SELECT * FROM session_messages WHERE seq = ?', (seq,)))
+
+    async def list(
+        self,
+        session_id: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[List[Any]] = None,
+        before: Optional[List[Any]] = None
+    ) -> List[dict]:
+        if after:
+            # Poll for new messages
+            rows = self._all(
+                'SELECT * FROM session_messages WHERE session_id = ? AND seq > ? '
+                'ORDER BY seq LIMIT ?',
+                (session_id, *after, limit)
+            )
+        elif before:
+            # Page back through older history, newest first, then flip
+            rows = self._all(
+                'SELECT * FROM session_messages WHERE session_id = ? AND seq < ? '
+                'ORDER BY seq DESC LIMIT ?',
+                (session_id, *before, limit)
+            )
+            rows.reverse()
+        else:
+            rows = self._all(
+                'SELECT * FROM session_messages WHERE session_id = ? '
+                'ORDER BY seq LIMIT ? OFFSET ?',
+                (session_id, limit, offset)
+            )
+        return [dict(row) for row in rows]
+
+    async def get_author_id(self, message_id: str) -> Optional[str]:
+        row = self._one('SELECT user_id FROM session_messages WHERE id = ?', (message_id,))
+        return row['user_id'] if row else None
+
+    async def delete(self, message_id: str) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM session_messages WHERE id = ?', (message_id,))
+
+    async def purge(self, session_id: str, batch_size: int) -> int:
+        with self.connection:
+            return self.connection.execute(
+                'DELETE FROM session_messages WHERE id IN '
+                '(SELECT id FROM session_messages WHERE session_id = ? LIMIT ?)',
+                (session_id, batch_size)
+            ).rowcount
+
+    async def version(self, session_id: str) -> str:
+        row = self._one('SELECT version FROM chat_versions WHERE session_id = ?', (session_id,))
+        return str(row['version'] if row else 0)
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage backed by one SQLite connection.
+
+    Args:
+        path: Database file, or ':memory:' for a throwaway database
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(SCHEMA)
+        super().__init__(
+            users=SQLiteUserRepository(self.connection),
+            sessions=SQLiteSessionRepository(self.connection),
+            participants=SQLiteParticipantRepository(self.connection),
+            messages=SQLiteMessageRepository(self.connection)
+        )
+
+    def query_plan(self, sql: str, params: Sequence[Any] = ()) -> List[str]:
+        """
+        Return SQLite's EXPLAIN QUERY PLAN for a statement, one step per line,
+        e.g. to check that a listing query is answered from an index.
+        """
+        rows = self.connection.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+        return [row['detail'] for row in rows]
+
+    def table_counts(self) -> Dict[str, int]:
+        """
+        Row counts per table.
+        """
+        return {
+            table: self.connection.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+            for table in ('users', 'study_sessions', 'session_participants', 'session_messages')
+        }
+
+    async def close(self) -> None:
+        self.connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'path': self.path}
@@ -0,0 +1,330 @@
+"""
+Supabase (PostgREST) storage backend.
+Every method is a single PostgREST request; atomic operations and version
+tokens are database functions defined in SUPABASE_SETUP.md.
+"""
+
+from typing import Any, List, Optional, Tuple
+from supabase import AsyncClient
+
+from models import SessionFilterRequest
+from functions.pagination import keyset_filter
+from functions.search_index import SEARCH_INDEX_COLUMNS
+from storage.base import (
+    Storage,
+    UserRepository,
+    SessionRepository,
+    ParticipantRepository,
+    MessageRepository
+)
+
+
+# Columns selected for every session listing.
+# The creator name is an embedded resource and the participant count is the
+# trigger-maintained current_capacity column, so a whole listing is fetched
+# in a single PostgREST round trip. Columns are listed so the search_vector
+# is never shipped to the API.
+SESSION_LISTING_SELECT = (
+    'id, title, course_code, description, date, time, location, meeting_type, '
+    'max_capacity, current_capacity, creator_id, created_at, updated_at, '
+    'creator:users!inner(first_name, last_name, school)'
+)
+
+# Sort key of the school listing, backed by idx_study_sessions_school_date_time_id
+SESSION_LISTING_ORDER = ('date', 'time', 'id')
+
+# Sort key of the calendar, backed by idx_study_sessions_school_starts_at
+CALENDAR_ORDER = ('starts_at', 'id')
+
+# Sort key of a session's participant list
+PARTICIPANT_ORDER = ('joined_at', 'user_id')
+
+# Sort key of a chat, backed by idx_session_messages_session_seq
+MESSAGE_ORDER = ('seq',)
+
+USER_PROFILE_COLUMNS = 'id, email, first_name, last_name, school'
+
+
+class SupabaseUserRepository(UserRepository):
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def email_exists(self, email: str) -> bool:
+        response = await self.client.table('users').select('id').eq('email', email).execute()
+        return bool(response.data)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        response = await self.client.table('users').select('*').eq('email', email).execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, user_data: dict) -> dict:
+        response = await self.client.table('users').insert(user_data).execute()
+        return response.data[0]
+
+    async def get_profile(self, user_id: str) -> Optional[dict]:
+        response = await self.client.table('users').select(USER_PROFILE_COLUMNS).eq('id', user_id).execute()
+        return response.data[0] if response.data else None
+
+    async def get_profiles(self, user_ids: List[str]) -> List[dict]:
+        response = await self.client.table('users').select(USER_PROFILE_COLUMNS).in_('id', user_ids).execute()
+        return response.data or []
+
+    async def update(self, user_id: str, changes: dict) -> Optional[dict]:
+        response = await self.client.table('users').update(changes).eq('id', user_id).execute()
+        return response.data[0] if response.data else None
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        response = await self.client.table('users').select('*').eq('id', user_id).execute()
+        return response.data[0] if response.data else None
+
+
+class SupabaseSessionRepository(SessionRepository):
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def create_many(self, rows: List[dict]) -> List[dict]:
+        response = await self.client.table('study_sessions').insert(rows).execute()
+        return response.data
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        response = await self.client.table('study_sessions').select(SESSION_LISTING_SELECT).eq('id', session_id).execute()
+        return response.data[0] if response.data else None
+
+    async def get_many(self, session_ids: List[str]) -> List[dict]:
+        response = await self.client.table('study_sessions').select(SESSION_LISTING_SELECT).in_('id', session_ids).execute()
+        return response.data or []
+
+    async def list_by_creator(self, user_id: str) -> List[dict]:
+        response = await self.client.table('study_sessions').select(SESSION_LISTING_SELECT).eq('creator_id', user_id).execute()
+        return response.data or []
+
+    async def list_school(
+        self,
+        school: str,
+        filters: Optional[SessionFilterRequest],
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[dict]:
+        query = self.client.table('study_sessions').select(SESSION_LISTING_SELECT).eq('school', school)
+
+        if filters:
+            if filters.course_code:
+                query = query.eq('course_code', filters.course_code)
+            if filters.meeting_type:
+                query = query.eq('meeting_type', filters.meeting_type.value)
+            if filters.date_from:
+                query = query.gte('date', filters.date_from)
+            if filters.date_to:
+                query = query.lte('date', filters.date_to)
+            if filters.exclude_full:
+                query = query.eq('is_full', 'false')
+
+        if after:
+            query = query.or_(keyset_filter(SESSION_LISTING_ORDER, after))
+
+        for column in SESSION_LISTING_ORDER:
+            query = query.order(column)
+
+        response = await query.limit(limit).execute()
+        return response.data or []
+
+    async def list_school_window(self, school: str, starts_from: str, starts_before: str) -> List[dict]:
+        query = (
+            self.client.table('study_sessions')
+            .select(SESSION_LISTING_SELECT)
+            .eq('school', school)
+            .gte('starts_at', starts_from)
+            .lt('starts_at', starts_before)
+        )
+        for column in CALENDAR_ORDER:
+            query = query.order(column)
+        response = await query.execute()
+        return response.data or []
+
+    async def list_search_rows(self, school: str) -> List[dict]:
+        response = await (
+            self.client.table('study_sessions')
+            .select(SEARCH_INDEX_COLUMNS)
+            .eq('school', school)
+            .execute()
+        )
+        return response.data or []
+
+    async def search(
+        self,
+        school: str,
+        filters: SessionFilterRequest,
+        limit: int,
+        after: Optional[List[Any]]
+    ) -> List[Tuple[float, str]]:
+        response = await self.client.rpc('search_sessions', {
+            'p_school': school,
+            'p_query': filters.search_term,
+            'p_course_code': filters.course_code,
+            'p_meeting_type': filters.meeting_type.value if filters.meeting_type else None,
+            'p_date_from': filters.date_from,
+            'p_date_to': filters.date_to,
+            'p_exclude_full': filters.exclude_full,
+            'p_limit': limit,
+            'p_after_rank': after[0] if after else None,
+            'p_after_id': after[1] if after else None
+        }).execute()
+        return [(row['rank'], row['id']) for row in response.data or []]
+
+    async def get_creator_id(self, session_id: str) -> Optional[str]:
+        response = await self.client.table('study_sessions').select('creator_id').eq('id', session_id).execute()
+        return response.data[0]['creator_id'] if response.data else None
+
+    async def exists(self, session_id: str) -> bool:
+        response = await self.client.table('study_sessions').select('id').eq('id', session_id).execute()
+        return bool(response.data)
+
+    async def delete(self, session_id: str, user_id: str) -> dict:
+        response = await self.client.rpc('delete_study_session', {'p_session_id': session_id, 'p_user_id': user_id}).execute()
+        return response.data
+
+    async def version(self, session_id: str) -> Optional[str]:
+        response = await self.client.table('study_sessions').select('version, creator:users!inner(updated_at)').eq('id', session_id).execute()
+        if not response.data:
+            return None
+        row = response.data[0]
+        return f"{row['version']}:{row['creator']['updated_at']}"
+
+    async def school_version(self, school: str) -> str:
+        response = await self.client.rpc('school_sessions_version', {'p_school': school}).execute()
+        return response.data
+
+    async def user_version(self, user_id: str) -> str:
+        response = await self.client.rpc('user_sessions_version', {'p_user_id': user_id}).execute()
+        return response.data
+
+
+class SupabaseParticipantRepository(ParticipantRepository):
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def add_many(self, rows: List[dict]) -> None:
+        await self.client.table('session_participants').insert(rows).execute()
+
+    async def join(self, session_id: str, user_id: str) -> dict:
+        response = await self.client.rpc('join_session', {'p_session_id': session_id, 'p_user_id': user_id}).execute()
+        return response.data
+
+    async def leave(self, session_id: str, user_id: str) -> dict:
+        response = await self.client.rpc('leave_session', {'p_session_id': session_id, 'p_user_id': user_id}).execute()
+        return response.data
+
+    async def session_ids_for_user(self, user_id: str) -> List[str]:
+        response = await self.client.table('session_participants').select('session_id').eq('user_id', user_id).execute()
+        return [row['session_id'] for row in response.data or []]
+
+    async def user_ids_for_session(self, session_id: str) -> List[str]:
+        response = await self.client.table('session_participants').select('user_id').eq('session_id', session_id).execute()
+        return [row['user_id'] for row in response.data or []]
+
+    async def is_participant(self, session_id: str, user_id: str) -> bool:
+        response = await (
+            self.client.table('session_participants')
+            .select('id')
+            .eq('session_id', session_id)
+            .eq('user_id', user_id)
+            .limit(1)
+            .execute()
+        )
+        return bool(response.data)
+
+    async def list(self, session_id: str, limit: Optional[int], after: Optional[List[Any]]) -> List[dict]:
+        # Participants and their names in one round trip via the embedded user
+        query = self.client.table('session_participants').select(
+            'user_id, joined_at, user:users!inner(id, first_name, last_name, email)'
+        ).eq('session_id', session_id)
+
+        if after:
+            query = query.or_(keyset_filter(PARTICIPANT_ORDER, after))
+
+        for column in PARTICIPANT_ORDER:
+            query = query.order(column)
+
+        if limit:
+            query = query.limit(limit)
+
+        response = await query.execute()
+        return response.data or []
+
+
+class SupabaseMessageRepository(MessageRepository):
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def create(self, message: dict) -> dict:
+        response = await self.client.table('session_messages').insert(message).execute()
+        return response.data[0]
+
+    async def list(
+        self,
+        session_id: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[List[Any]] = None,
+        before: Optional[List[Any]] = None
+    ) -> List[dict]:
+        query = self.client.table('session_messages').select('*').eq('session_id', session_id)
+
+        if after:
+            # Poll for new messages
+            query = query.or_(keyset_filter(MESSAGE_ORDER, after))
+            for column in MESSAGE_ORDER:
+                query = query.order(column)
+            query = query.limit(limit)
+        elif before:
+            # Page back through older history, newest first, then flip
+            query = query.or_(keyset_filter(MESSAGE_ORDER, before, descending=True))
+            for column in MESSAGE_ORDER:
+                query = query.order(column, desc=True)
+            query = query.limit(limit)
+        else:
+            for column in MESSAGE_ORDER:
+                query = query.order(column)
+            query = query.range(offset, offset + limit - 1)
+
+        response = await query.execute()
+        rows = response.data or []
+        if before:
+            rows.reverse()
+        return rows
+
+    async def get_author_id(self, message_id: str) -> Optional[str]:
+        response = await self.client.table('session_messages').select('user_id').eq('id', message_id).execute()
+        return response.data[0]['user_id'] if response.data else None
+
+    async def delete(self, message_id: str) -> None:
+        await self.client.table('session_messages').delete().eq('id', message_id).execute()
+
+    async def purge(self, session_id: str, batch_size: int) -> int:
+        response = await self.client.rpc('purge_session_messages', {'p_session_id': session_id, 'p_batch_size': batch_size}).execute()
+        return response.data
+
+    async def version(self, session_id: str) -> str:
+        response = await self.client.rpc('session_messages_version', {'p_session_id': session_id}).execute()
+        return response.data
+
+
+class SupabaseStorage(Storage):
+    """
+    Storage backed by the shared async Supabase client.
+    """
+
+    name = 'supabase'
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+        super().__init__(
+            users=SupabaseUserRepository(client),
+            sessions=SupabaseSessionRepository(client),
+            participants=SupabaseParticipantRepository(client),
+            messages=SupabaseMessageRepository(client)
+        )
@@ -1,31 +1,52 @@
 """
 Supabase client initialization and connection management.
 This module creates and manages the Supabase client used for database operations.
+
+The client is the asynchronous supabase/postgrest client, so every database
+round trip is awaited instead of blocking the event loop. Concurrent requests
+in a worker therefore overlap their I/O instead of being serialized.
 """
 
-from supabase import create_client, Client
+import asyncio
+from typing import Optional
+from supabase import acreate_client, AsyncClient
 from config import settings
 
-# Initialize Supabase client with credentials from environment variables
-# Only initialize if both URL and key are provided
-if settings.SUPABASE_URL and settings.SUPABASE_KEY:
-    supabase: Client = create_client(
-        supabase_url=settings.SUPABASE_URL,
-        supabase_key=settings.SUPABASE_KEY
-    )
-else:
-    supabase: Client = None
+# Async Supabase client, created on startup (or on first use)
+# Only initialized if both URL and key are provided
+supabase: Optional[AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+
+async def init_supabase_client() -> Optional[AsyncClient]:
+    """
+    Create the shared async Supabase client if it does not exist yet.
+    
+    Returns:
+        AsyncClient instance, or None if credentials are not configured
+    """
+    global supabase
+    if supabase is None and settings.SUPABASE_URL and settings.SUPABASE_KEY:
+        async with _client_lock:
+            if supabase is None:
+                supabase = await acreate_client(
+                    supabase_url=settings.SUPABASE_URL,
+                    supabase_key=settings.SUPABASE_KEY
+                )
+    return supabase
+
 
-def get_supabase_client() -> Client:
+async def get_supabase_client() -> AsyncClient:
     """
     Dependency function to provide Supabase client to routes.
     
     Returns:
-        Client: Supabase client instance
+        AsyncClient: Async Supabase client instance
     """
-    if supabase is None:
+    client = await init_supabase_client()
+    if client is None:
         raise RuntimeError(
             "Supabase client not initialized. "
             "Please set SUPABASE_URL and SUPABASE_KEY in your .env file"
         )
-    return supabase
\ No newline at end of file
+    return client
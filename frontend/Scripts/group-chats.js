@@ -24,8 +24,16 @@
   const chatTitle = document.getElementById('chatTitle');
   const chatCourseCode = document.getElementById('chatCourseCode');
 
+  // Poll every 3 seconds without a WebSocket. With one, keep a slow catch-up
+  // poll: the socket only sees messages posted to the same server worker
+  const POLL_INTERVAL_MS = 3000;
+  const SOCKET_CATCH_UP_INTERVAL_MS = 30000;
+
   let currentSessionId = null;
   let messagePollingInterval = null;
+  let newestCursor = null;
+  let chatSocket = null;
+  const shownMessageIds = new Set();
 
   // Load user's sessions
   async function loadChats() {
@@ -115,8 +123,9 @@
     
     await loadMessages();
     
-    // Start polling for new messages every 3 seconds
-    messagePollingInterval = setInterval(loadMessages, 3000);
+    // Poll for new messages until the real-time connection is up
+    startPolling();
+    connectSocket(session.id);
     
     // Focus input
     messageInput.focus();
@@ -127,15 +136,60 @@
     chatModal.classList.remove('active');
     document.body.classList.remove('modal-open');
     currentSessionId = null;
+    newestCursor = null;
     chatMessages.innerHTML = '';
     messageInput.value = '';
     
+    stopPolling();
+    if (chatSocket) {
+      const socket = chatSocket;
+      chatSocket = null;
+      socket.close();
+    }
+  }
+
+  // Poll for new messages, replacing any poll already running
+  function startPolling(intervalMs = POLL_INTERVAL_MS) {
+    stopPolling();
+    messagePollingInterval = setInterval(pollNewMessages, intervalMs);
+  }
+
+  function stopPolling() {
     if (messagePollingInterval) {
       clearInterval(messagePollingInterval);
       messagePollingInterval = null;
     }
   }
 
+  // Receive new messages over a WebSocket, falling back to polling if it drops
+  function connectSocket(sessionId) {
+    if (!('WebSocket' in window)) return;
+
+    const socket = new WebSocket(`ws://127.0.0.1:8000/chat/${sessionId}/ws?token=${encodeURIComponent(token)}`);
+    chatSocket = socket;
+
+    socket.addEventListener('open', () => {
+      if (chatSocket !== socket) return;
+      // Catch up on anything sent before the socket subscribed, then slow down
+      pollNewMessages();
+      startPolling(SOCKET_CATCH_UP_INTERVAL_MS);
+    });
+
+    socket.addEventListener('message', (e) => {
+      if (chatSocket === socket) appendMessages([JSON.parse(e.data)]);
+    });
+
+    socket.addEventListener('close', () => {
+      if (chatSocket !== socket) return;
+      chatSocket = null;
+      if (currentSessionId === sessionId) {
+        // Catch up on anything missed, then keep polling
+        pollNewMessages();
+        startPolling();
+      }
+    });
+  }
+
   // Load messages for current session
   async function loadMessages() {
     if (!currentSessionId) return;
@@ -151,15 +205,17 @@
       }
 
       const messages = await response.json();
+      newestCursor = response.headers.get('X-Next-Cursor');
       
       // Store current scroll position
       const wasAtBottom = chatMessages.scrollHeight - chatMessages.scrollTop === chatMessages.clientHeight;
       
       chatMessages.innerHTML = '';
+      shownMessageIds.clear();
       
       if (messages.length === 0) {
         chatMessages.innerHTML = `
-          <div style="text-align: center; color: #999; padding: 40px 20px;">
+          <div class="chat-empty" style="text-align: center; color: #999; padding: 40px 20px;">
             No messages yet. Start the conversation!
           </div>
         `;
@@ -169,6 +225,7 @@
       messages.forEach(msg => {
         const messageEl = createMessageElement(msg);
         chatMessages.appendChild(messageEl);
+        shownMessageIds.add(msg.id);
       });
 
       // Scroll to bottom if was at bottom or first load
@@ -180,6 +237,52 @@
     }
   }
 
+  // Fetch only messages newer than the last one shown and append them
+  async function pollNewMessages() {
+    if (!currentSessionId) return;
+    if (!newestCursor) {
+      await loadMessages();
+      return;
+    }
+
+    const sessionId = currentSessionId;
+
+    try {
+      const response = await fetch(`http://127.0.0.1:8000/chat/${sessionId}/messages?after=${encodeURIComponent(newestCursor)}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+
+      if (!response.ok || sessionId !== currentSessionId) return;
+
+      const messages = await response.json();
+      newestCursor = response.headers.get('X-Next-Cursor') || newestCursor;
+
+      appendMessages(messages);
+    } catch (error) {
+      console.error('[Group Chats] Error polling messages:', error);
+    }
+  }
+
+  // Append messages that are not on screen yet
+  function appendMessages(messages) {
+    const fresh = messages.filter(msg => !shownMessageIds.has(msg.id));
+    if (fresh.length === 0) return;
+
+    const wasAtBottom = chatMessages.scrollHeight - chatMessages.scrollTop === chatMessages.clientHeight;
+
+    const placeholder = chatMessages.querySelector('.chat-empty');
+    if (placeholder) placeholder.remove();
+
+    fresh.forEach(msg => {
+      chatMessages.appendChild(createMessageElement(msg));
+      shownMessageIds.add(msg.id);
+    });
+
+    if (wasAtBottom) {
+      chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+  }
+
   // Create message element
   function createMessageElement(message) {
     const div = document.createElement('div');
@@ -238,7 +341,8 @@
       }
 
       messageInput.value = '';
-      await loadMessages();
+      const sent = await response.json();
+      appendMessages([sent]);
     } catch (error) {
       console.error('[Group Chats] Error sending message:', error);
       alert('Error sending message. Please try again.');
@@ -272,8 +376,9 @@
 
   // Clean up on page unload
   window.addEventListener('beforeunload', () => {
-    if (messagePollingInterval) {
-      clearInterval(messagePollingInterval);
+    stopPolling();
+    if (chatSocket) {
+      chatSocket.close();
     }
   });
 
@@ -210,21 +210,31 @@
     async function loadSessions() {
         try {
             console.log('[Sessions] Fetching sessions from backend');
-            const res = await fetch('http://127.0.0.1:8000/sessions/', {
-                method: 'GET',
-                headers: {
-                    'Authorization': `Bearer ${token}`
+            const sessions = [];
+            let cursor = null;
+
+            // Follow the X-Next-Cursor header until the last page
+            do {
+                const url = 'http://127.0.0.1:8000/sessions/?limit=100' + (cursor ? `&after=${encodeURIComponent(cursor)}` : '');
+                const res = await fetch(url, {
+                    method: 'GET',
+                    headers: {
+                        'Authorization': `Bearer ${token}`
+                    }
+                });
+
+                if (!res.ok) {
+                    const err = await res.json().catch(() => ({}));
+                    console.error('[Sessions] Failed to fetch sessions:', err);
+                    sessionsContainer.innerHTML = `<p>Error loading sessions: ${err.detail || res.statusText}</p>`;
+                    return;
                 }
-            });
 
-            if (!res.ok) {
-                const err = await res.json().catch(() => ({}));
-                console.error('[Sessions] Failed to fetch sessions:', err);
-                sessionsContainer.innerHTML = `<p>Error loading sessions: ${err.detail || res.statusText}</p>`;
-                return;
-            }
+                sessions.push(...await res.json());
+                cursor = res.headers.get('X-Next-Cursor');
+            } while (cursor);
 
-            allSessions = await res.json();
+            allSessions = sessions;
             console.log('[Sessions] Received', allSessions.length, 'sessions');
 
             // Display all sessions initially
@@ -235,6 +245,37 @@
         }
     }
 
+    // Keep the listing current from the server's change stream
+    function subscribeToSessionEvents() {
+        if (!('EventSource' in window)) return;
+
+        const events = new EventSource(`http://127.0.0.1:8000/sessions/events?token=${encodeURIComponent(token)}`);
+
+        events.onmessage = (e) => {
+            const event = JSON.parse(e.data);
+
+            if (event.type === 'session_created') {
+                if (!allSessions.some(s => s.id === event.session_id)) {
+                    allSessions.push(event.session);
+                }
+            } else if (event.type === 'session_deleted') {
+                allSessions = allSessions.filter(s => s.id !== event.session_id);
+            } else if (event.type === 'capacity_changed') {
+                const session = allSessions.find(s => s.id === event.session_id);
+                if (!session) return;
+                session.current_capacity = event.current_capacity;
+                session.max_capacity = event.max_capacity;
+                session.is_full = event.is_full;
+            } else {
+                return;
+            }
+
+            filterSessions(searchInput.value);
+        };
+
+        window.addEventListener('beforeunload', () => events.close());
+    }
+
     // Load sessions when page loads
-    loadSessions();
+    loadSessions().then(subscribeToSessionEvents);
 })();